@@ -12,6 +12,11 @@ Interactive API docs (test without any frontend):
     http://localhost:8000/docs
 """
 
+import matplotlib
+# The server only writes figures to files (and from worker threads), so use
+# the non-interactive Agg backend instead of whatever GUI backend is default
+matplotlib.use("Agg")
+
 import asyncio
 import base64
 import dataclasses
@@ -1305,6 +1310,7 @@ class SelectPairsRequest(BaseModel):
     max_degree:    int   = 999
     force_connect: bool  = True
     max_workers:   int   = 4
+    baseline_cache: bool = True
 
 
 @app.post("/api/folder-select-pairs", response_model=JobResponse)
@@ -1363,6 +1369,7 @@ async def _run_folder_select_pairs(job_id: str, req: SelectPairsRequest):
                 max_degree=req.max_degree,
                 force_connect=req.force_connect,
                 max_workers=req.max_workers,
+                cache_dir=folder / ".baseline_cache" if req.baseline_cache else None,
             )
 
             # Save pairs and network plot into the folder
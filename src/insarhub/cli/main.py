@@ -138,6 +138,9 @@ def create_parser() -> argparse.ArgumentParser:
                          help="Force connectivity for isolated scenes (default: True)")
     g_pairs.add_argument("--sp-workers", type=int, default=8, metavar="INT",
                          help="Threads for baseline API fallback (default: 8)")
+    g_pairs.add_argument("--baseline-cache", metavar="PATH", nargs="?", const="__default__", default=None,
+                         help="Cache baseline tables fetched through the API fallback in this directory; "
+                              "omit the value to use <workdir>/.baseline_cache (default: no cache)")
     g_pairs.add_argument("--pairs-output", metavar="PATH", default=None,
                          help="Output file for pairs (default: <workdir>/pairs.json)")
 
@@ -1079,6 +1082,8 @@ def cmd_downloader(args, extra_args: list[str]):
             max_degree=args.max_degree,
             force_connect=args.force_connect,
             max_workers=args.sp_workers,
+            cache_dir=(downloader.config.workdir / ".baseline_cache"
+                       if args.baseline_cache == "__default__" else args.baseline_cache),
         )
 
         dl_workdir = downloader.config.workdir
@@ -1761,6 +1766,10 @@ _HANDLERS = {
 
 
 def main():
+    # The CLI only saves figures to disk; the Agg backend skips GUI canvas setup
+    import matplotlib
+    matplotlib.use("Agg")
+
     parser = create_parser()
     args, extra_args = parser.parse_known_args()
 
@@ -1,9 +1,20 @@
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from typing import ClassVar, List, Union, Optional, Any
 from pathlib import Path
 from asf_search import constants
 from insarhub import _env
 
+@lru_cache(maxsize=512)
+def _mintpy_key(field_name: str) -> str:
+    """Map a config field such as ``network_minCoherence`` to ``mintpy.network.minCoherence``.
+
+    Field names are fixed per class, so each split is computed once and reused
+    by every later ``write_mintpy_config`` call.
+    """
+    head, _, rest = field_name.partition('_')
+    return f"mintpy.{head}.{rest.replace('_', '.')}" if rest else f"mintpy.{head}"
+
 # ---------------------------------------------------------------------------
 # Downloader configurations
 # ---------------------------------------------------------------------------
@@ -852,16 +863,14 @@ class Mintpy_SBAS_Base_Config:
         with open(outpath, 'w') as f:
             f.write("## MintPy Config File Generated via InSARHub\n")
 
-            for key, value in asdict(self).items():
+            # Flat fields: read them directly instead of deep-copying through asdict()
+            for f_ in fields(self):
+                key = f_.name
                 if key in exclude_fields:
                     continue
+                value = getattr(self, key)
 
-                parts = key.split('_')
-                if len(parts) > 1:
-                    mintpy_key = f"mintpy.{parts[0]}.{'.'.join(parts[1:])}"
-                else:
-                    mintpy_key = f"mintpy.{parts[0]}"
-
+                mintpy_key = _mintpy_key(key)
                 f.write(f"{mintpy_key:<40} = {value}\n")
 
         return Path(outpath).resolve()
@@ -1,6 +1,18 @@
 import dataclasses
 from copy import deepcopy
 
+_UNSET = object()
+
+def _same_value(current, new):
+    """True only if *new* certainly equals *current*; arrays and geometries whose
+    ``==`` is not a plain bool count as different."""
+    if current is new:
+        return True
+    try:
+        return (current == new) is True
+    except Exception:
+        return False
+
 class Registry:
     def __init__(self):
         self._registry = {}
@@ -9,7 +21,8 @@ class Registry:
         self._registry[cls.name] = cls
         return cls
 
-    def create(self, name, config=None, **overrides):
+    def create(self, name, config=None, *, init_kwargs=None, **overrides):
+        # init_kwargs go to the class constructor (e.g. shared clients), not the config
         if name not in self._registry:
             raise ValueError(f"{name} not registered")
         cls = self._registry[name]
@@ -21,6 +34,14 @@ class Registry:
         else:
             final_config = {}
 
+        if overrides and dataclasses.is_dataclass(final_config):
+            # Overrides equal to the current value would only rebuild the dataclass;
+            # unknown names always differ, so replace() still rejects them below
+            overrides = {
+                k: v for k, v in overrides.items()
+                if not _same_value(getattr(final_config, k, _UNSET), v)
+            }
+
         if overrides:
             if dataclasses.is_dataclass(final_config):
                 try:
@@ -35,7 +56,7 @@ class Registry:
                         setattr(final_config, key, value)
                     else:
                         raise AttributeError(f"'{type(final_config).__name__}' has no field '{key}'")
-        return cls(final_config)
+        return cls(final_config, **(init_kwargs or {}))
 
     def available(self):
         return list(self._registry.keys())
@@ -1,16 +1,17 @@
 # -*- coding: utf-8 -*-
 import getpass
+import netrc
+import os
+import stat
 import threading
 import time
-from dataclasses import asdict
+from dataclasses import fields
 from dateutil.parser import isoparse
 from collections import defaultdict
 from pathlib import Path
 
 
 import asf_search as asf
-import contextily as ctx
-import dem_stitcher
 import matplotlib.pyplot as plt
 import rasterio as rio
 from asf_search.exceptions import ASFAuthenticationError
@@ -25,6 +26,9 @@ from insarhub.core.base import BaseDownloader
 from insarhub.config import ASF_Base_Config
 from insarhub.utils.tool import _to_wkt
 
+# Bytes -> MiB
+_INV_MB = 1.0 / (1024 * 1024)
+
 class ASF_Base_Downloader(BaseDownloader):
     """
     Simplify searching and downloading satellite data using ASF Search API.
@@ -88,10 +92,7 @@ Check documentation for how to setup .netrc file.\n""")
                     print(f"{Fore.RED}Authentication failed. Please check your credentials and try again.\n")
                     continue
                 print(f"{Fore.GREEN}Authentication successful.\n")
-                netrc_path = Path.home().joinpath(".netrc")
-                asf_entry = f"\nmachine urs.earthdata.nasa.gov\n    login {_username}\n    password {_password}\n"
-                with open(netrc_path, 'a') as f:
-                    f.write(asf_entry)
+                netrc_path = self._append_netrc('urs.earthdata.nasa.gov', _username, _password)
                 print(f"{Fore.GREEN}Credentials saved to {netrc_path}. You can now use the downloader without entering credentials again.\n")
                 break
         else:
@@ -107,29 +108,79 @@ Check documentation for how to setup .netrc file.\n""")
             bool: True if .netrc file exists and contains the keyword, False otherwise.
         """
         netrc_path = Path.home().joinpath('.netrc')
-        if not netrc_path.is_file():            
+        # One stat serves both the regular-file check and the parse cache key
+        try:
+            st = os.stat(netrc_path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
             print(f"{Fore.RED}No .netrc file found in your home directory. Will prompt login.\n")
             return False
         else: 
-            with netrc_path.open() as f:
-                content = f.read()
-                if keyword in content:
-                    return True
-                else:
-                    print(f"{Fore.RED}no machine name {keyword} found .netrc file. Will prompt login.\n")
-                    return False
+            if keyword.removeprefix('machine ').strip() in self._netrc_hosts(netrc_path, st.st_mtime_ns):
+                return True
+            else:
+                print(f"{Fore.RED}no machine name {keyword} found .netrc file. Will prompt login.\n")
+                return False
+
+    def _append_netrc(self, machine: str, login: str, password: str) -> Path:
+        """Append one machine entry to ~/.netrc in a single write and restrict it to the owner.
+
+        Args:
+            machine (str): Host name of the entry.
+            login (str): Username for the host.
+            password (str): Password for the host.
+
+        Returns:
+            Path: Path of the .netrc file written.
+        """
+        netrc_path = Path.home().joinpath(".netrc")
+        entry = f"\nmachine {machine}\n    login {login}\n    password {password}\n"
+        fd = os.open(netrc_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, entry.encode())
+        finally:
+            os.close(fd)
+        os.chmod(netrc_path, 0o600)
+        return netrc_path
+
+    def _netrc_hosts(self, netrc_path: Path, mtime: int) -> set:
+        """Return the machine names in .netrc, parsed once per file modification.
+
+        Credentials appended by the login prompts bump the mtime, so the next
+        check re-parses the file.
+
+        Args:
+            netrc_path (Path): Path to the .netrc file.
+            mtime (int): Modification time of the file in nanoseconds.
+
+        Returns:
+            set: Machine names defined in the file.
+        """
+        cached = getattr(self, '_netrc_cache', None)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            # An explicit path skips the default-file permission check, matching
+            # the plain text search this replaces
+            hosts = set(netrc.netrc(netrc_path.as_posix()).hosts)
+        except netrc.NetrcParseError:
+            # Fall back to scanning the raw text for machine entries
+            tokens = netrc_path.read_text().split()
+            hosts = {tokens[i + 1] for i, tok in enumerate(tokens[:-1]) if tok == 'machine'}
+        self._netrc_cache = (mtime, hosts)
+        return hosts
                 
     
-    def _get_group_key(self, result) -> tuple:
-        """Derive grouping key based on available properties, with fallback.
-        
-        Args:
-            result: Search result object containing properties.
-            
+    def _group_key_fields(self) -> tuple[str, str]:
+        """Property names of the grouping key, derived from the config with fallback.
+
+        The choice depends only on the config, so it is made once per search
+        rather than once per result.
+
         Returns:
-            tuple: A tuple of (path_number, frame_identifier) used for grouping results.
+            tuple: Names of the (path_number, frame_identifier) properties used for grouping results.
         """
-        props = result.properties
         # Burst product — any burst ID field set in config takes highest priority
         if any([
             self.config.absoluteBurstID,
@@ -137,13 +188,13 @@ Check documentation for how to setup .netrc file.\n""")
             self.config.operaBurstID,
             self.config.relativeBurstID,
         ]):
-            return (props.get('pathNumber'), props.get('burstID'))
+            return ('pathNumber', 'burstID')
         
         if self.config.asfFrame is not None:
-            return (props.get('pathNumber'), props.get('asfFrame'))
+            return ('pathNumber', 'asfFrame')
         
         if self.config.frame is not None:
-            return (props.get('pathNumber'), props.get('frameNumber'))
+            return ('pathNumber', 'frameNumber')
         
         # Dataset-level mapping
         if self.config.dataset:
@@ -151,22 +202,43 @@ Check documentation for how to setup .netrc file.\n""")
             for ds in datasets:
                 ds_upper = ds.upper()
                 if ds_upper in self._DATASET_GROUP_KEYS:
-                    pk, fk = self._DATASET_GROUP_KEYS[ds_upper]
-                    return (props.get(pk), props.get(fk))
+                    return self._DATASET_GROUP_KEYS[ds_upper]
         # Platform-level fallback mapping      
         if self.config.platform:
             platforms = [self.config.platform] if isinstance(self.config.platform, str) else self.config.platform
             for pl in platforms:
                 pl_upper = pl.upper()
                 if 'SENTINEL' in pl_upper:
-                    return (props.get('pathNumber'), props.get('frameNumber'))
+                    return ('pathNumber', 'frameNumber')
                 if 'ALOS' in pl_upper:
-                    return (props.get('pathNumber'), props.get('frameNumber'))
+                    return ('pathNumber', 'frameNumber')
                 if 'NISAR' in pl_upper:
-                    return (props.get('pathNumber'), props.get('frameID'))
+                    return ('pathNumber', 'frameID')
         # last resort — group everything under the platform name
-        return (props.get('pathNumber'), props.get('frameNumber'))
+        return ('pathNumber', 'frameNumber')
     
+    def _get_group_key(self, result) -> tuple:
+        """Derive grouping key based on available properties, with fallback.
+        
+        Args:
+            result: Search result object containing properties.
+            
+        Returns:
+            tuple: A tuple of (path_number, frame_identifier) used for grouping results.
+        """
+        pk, fk = self._group_key_fields()
+        props = result.properties
+        return (props.get(pk), props.get(fk))
+
+    def _group_results(self, results) -> dict:
+        """Bucket results by (path, frame) in one pass, resolving the key fields once."""
+        pk, fk = self._group_key_fields()
+        grouped = defaultdict(list)
+        for result in results:
+            props = result.properties
+            grouped[(props.get(pk), props.get(fk))].append(result)
+        return grouped
+
     def _get_property_keys(self) -> dict:
         """Return the correct result.properties key mapping based on config.
         
@@ -255,8 +327,12 @@ Check documentation for how to setup .netrc file.\n""")
             return self._search_by_name(names)
 
         print(f"Searching for SLCs....")
-        search_opts = {k: v for k, v in asdict(self.config).items()
-                       if v is not None and k not in ['workdir', 'name', 'bbox', 'granule_names']}
+        # Read fields directly: asdict() would deep-copy every value just to filter it
+        search_opts = {
+            f.name: v for f in fields(self.config)
+            if f.name not in ('workdir', 'name', 'bbox', 'granule_names')
+            and (v := getattr(self.config, f.name)) is not None
+        }
 
         for attempt in range(1, 11):
             try:
@@ -273,10 +349,7 @@ Check documentation for how to setup .netrc file.\n""")
         else:
             print(f"{Fore.GREEN} -- A total of {len(self.results)} results found. \n")
 
-        grouped = defaultdict(list)
-        for result in self.results:
-            key = self._get_group_key(result)
-            grouped[key].append(result)
+        grouped = self._group_results(self.results)
         self.results = grouped
         if len(grouped) > 1:
             print(f"{Fore.YELLOW}The AOI crosses {len(grouped)} stacks")
@@ -316,10 +389,7 @@ Check documentation for how to setup .netrc file.\n""")
                 seen.add(sname)
                 deduped.append(result)
 
-        grouped: dict = defaultdict(list)
-        for result in deduped:
-            key = self._get_group_key(result)
-            grouped[key].append(result)
+        grouped = self._group_results(deduped)
         self.results = grouped
         print(f"{Fore.GREEN} -- Found {len(deduped)} scenes across {len(grouped)} stack(s).\n")
         if len(deduped) < len(clean):
@@ -402,6 +472,8 @@ Check documentation for how to setup .netrc file.\n""")
             save_path (str, optional): Path to save the figure. If None, displays interactively.
                 Defaults to None.
         """
+        import contextily as ctx
+
         results_to_plot = self.active_results
         if not results_to_plot:
             print(f"{Fore.RED}No results to plot.")
@@ -650,6 +722,7 @@ Check documentation for how to setup .netrc file.\n""")
         Returns:
             tuple: (X, p) where X is the DEM array and p is the rasterio profile.
         """
+        import dem_stitcher
         output_dir = Path(save_path).expanduser().resolve() if save_path else self.config.workdir
 
         for key, results in self.active_results.items():
@@ -680,6 +753,7 @@ Check documentation for how to setup .netrc file.\n""")
         max_degree: int = 999,
         force_connect: bool = True,
         max_workers: int = 4,
+        cache_dir: str | Path | None = None,
     ) -> tuple:
         """Compute interferogram pairs for all active stacks.
 
@@ -692,6 +766,8 @@ Check documentation for how to setup .netrc file.\n""")
             max_degree (int, optional): Maximum number of connections per scene. Defaults to 999.
             force_connect (bool, optional): Force connectivity for isolated scenes. Defaults to True.
             max_workers (int, optional): Threads for API baseline fallback. Defaults to 4.
+            cache_dir (str | Path, optional): Directory for caching API-fetched baseline tables,
+                e.g. ``<workdir>/.baseline_cache``. Defaults to None (no caching).
 
         Returns:
             tuple: (pairs, baselines, scene_bperp)
@@ -714,6 +790,7 @@ Check documentation for how to setup .netrc file.\n""")
             max_degree=max_degree,
             force_connect=force_connect,
             max_workers=max_workers,
+            cache_dir=cache_dir,
         )
         pairs, baselines = _sp_result[0], _sp_result[1]
         scene_bperp: dict = _sp_result[2] if len(_sp_result) > 2 else {}
@@ -744,7 +821,7 @@ Check documentation for how to setup .netrc file.\n""")
 
         if stop_event is None:
             stop_event = threading.Event()
-        _cfg_base = {k: v for k, v in asdict(self.config).items() if k != 'workdir'}
+        _cfg_base = {f.name: getattr(self.config, f.name) for f in fields(self.config) if f.name != 'workdir'}
 
         jobs = []
         for key, results in self.active_results.items():
@@ -757,6 +834,8 @@ Check documentation for how to setup .netrc file.\n""")
                 jobs.append((key, result, download_path))
         
         total_jobs   = len(jobs)
+        # No point starting more workers than there are files
+        max_workers  = max(1, min(max_workers, total_jobs))
         success_count = 0
         failure_count = 0
         failed_files  = []
@@ -768,15 +847,29 @@ Check documentation for how to setup .netrc file.\n""")
           f"{len(self.active_results)} stacks "
           f"({max_workers} concurrent)...\n")
         
+        # One session per worker thread: later files on the same worker reuse
+        # its pooled keep-alive connections instead of a new TLS handshake each
+        thread_local = threading.local()
+        # Every session created, so they can be closed once the workers finish
+        thread_sessions = []
+
+        def _thread_session():
+            session = getattr(thread_local, 'session', None)
+            if session is None:
+                session = asf.ASFSession()
+                session.cookies.update(self.session.cookies)
+                session.headers.update(self.session.headers)
+                thread_local.session = session
+                thread_sessions.append(session)
+            return session
+
         def _stream_download_interruptible(url, file_path, expected_bytes, 
                                         pbar_position, scene_name):
             """Stream download that checks stop_event on every chunk."""
             from tqdm import tqdm
             from asf_search.download.download import _try_get_response
 
-            thread_session = asf.ASFSession()
-            thread_session.cookies.update(self.session.cookies)
-            thread_session.headers.update(self.session.headers)
+            thread_session = _thread_session()
 
             for attempt in range(1, 4):
                 if stop_event.is_set():
@@ -818,13 +911,14 @@ Check documentation for how to setup .netrc file.\n""")
         
         def _download_job(args):
             key, result, download_path, position = args
-            file_id   = result.properties['fileID']
-            size_b    = result.properties['bytes']
-            size_mb   = size_b / (1024 * 1024)
-            filename  = result.properties.get('fileName', f"{file_id}.zip")
+            props     = result.properties
+            file_id   = props['fileID']
+            size_b    = props['bytes']
+            size_mb   = size_b * _INV_MB
+            filename  = props.get('fileName', f"{file_id}.zip")
             file_path = download_path / filename
 
-            scene_name = result.properties.get('sceneName', file_id)
+            scene_name = props.get('sceneName', file_id)
 
             if stop_event.is_set():
                 return file_id, 'cancelled', 0, None
@@ -843,7 +937,7 @@ Check documentation for how to setup .netrc file.\n""")
             try:
                 start_time = time.time()
                 _stream_download_interruptible(
-                    url=result.properties['url'],
+                    url=props['url'],
                     file_path=file_path,
                     expected_bytes=size_b,
                     pbar_position=position,
@@ -924,6 +1018,11 @@ Check documentation for how to setup .netrc file.\n""")
 
         else:
             executor.shutdown(wait=True)
+        finally:
+            # Also on interrupt or error: workers still streaming have been told to
+            # stop, and a closed session only makes them stop sooner
+            for session in thread_sessions:
+                session.close()
 
         # Final summary
         print("\n" + "─" * 60)
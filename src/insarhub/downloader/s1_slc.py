@@ -9,6 +9,16 @@ from tqdm import tqdm
 from insarhub.config import S1_SLC_Config
 from .asf_base import ASF_Base_Downloader
 
+# Shared HTTP session for CDSE requests, created on first use so repeated
+# credential checks reuse one pooled keep-alive connection
+_HTTP_SESSION = None
+
+def _http():
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        _HTTP_SESSION = requests.Session()
+    return _HTTP_SESSION
+
 class S1_SLC(ASF_Base_Downloader):
     name = "S1_SLC"
     description = "Sentinel-1 SLC scene search and download via ASF."
@@ -62,22 +72,23 @@ If CDSE download fails, ASF will be attempted as a fallback.""")
                     continue
                 else:
                     print(f"{Fore.GREEN}Authentication successful.\n")
-                    netrc_path = Path.home().joinpath(".netrc")
-                    cdse_entry = f"\nmachine dataspace.copernicus.eu\n    login {self._cdse_username}\n    password {self._cdse_password}\n"
-                    with open(netrc_path, 'a') as f:
-                        f.write(cdse_entry)
+                    netrc_path = self._append_netrc('dataspace.copernicus.eu', self._cdse_username, self._cdse_password)
                     print(f"{Fore.GREEN}Credentials saved to {netrc_path}. You can now download orbit from CDSE without entering credentials again.\n")
                     break
 
         base_dir = Path(save_dir) if save_dir else (getattr(self, 'download_dir', None) or Path(getattr(self.config, 'workdir', None) or Path.cwd()))
         all_items = [(key, result) for key, results in self.results.items() for result in results]  # type: ignore[union-attr]
+        # Scenes of one stack share a folder; create each folder once per call
+        made_dirs = set()
         with tqdm(all_items, desc="Orbit files", unit="scene", bar_format="{l_bar}{bar:20}{r_bar}") as pbar:
             for key, result in pbar:
                 if stop_event is not None and stop_event.is_set():
                     tqdm.write("Orbit download stopped.")
                     break
                 download_path = Path(save_dir) if save_dir else Path(base_dir) / f'p{key[0]}_f{key[1]}'
-                download_path.mkdir(parents=True, exist_ok=True)
+                if download_path not in made_dirs:
+                    download_path.mkdir(parents=True, exist_ok=True)
+                    made_dirs.add(download_path)
                 scene_name = result.properties['sceneName']
                 short_name = scene_name[:40] + "..."
                 acq_time = scene_name.replace("__", "_").split("_")[4]
@@ -120,6 +131,7 @@ If CDSE download fails, ASF will be attempted as a fallback.""")
             "username": username,
             "password": password
         }
-        resp = requests.post(url, data=data)
-        return resp.status_code == 200 and "access_token" in resp.json()
+        resp = _http().post(url, data=data, timeout=30)
+        # Only the presence of the token matters, so test the raw body instead of parsing it
+        return resp.status_code == 200 and b'"access_token"' in resp.content
 
@@ -34,10 +34,11 @@ class Hyp3Base(Hyp3Processor):
     """
     default_config = Hyp3_Base_Config
     
-    def __init__(self, config: Hyp3_Base_Config | None = None):
+    def __init__(self, config: Hyp3_Base_Config | None = None, clients: dict | None = None):
         super().__init__(config)
         self.config = config
         self._current_client_user = None 
+        self._clients = clients
         self._hyp3_authorize(pool=self.config.earthdata_credentials_pool)
         
         
@@ -80,6 +81,19 @@ class Hyp3Base(Hyp3Processor):
             _roles["downloader"] = _dl
         write_workflow_marker(self.output_dir, **_roles)
 
+    def _hyp3_client(self, username: str | None = None, password: str | None = None) -> HyP3:
+        """Return a HyP3 client for the account, reusing one from ``self._clients`` when given.
+
+        Without a shared ``clients`` dict every call logs in again, so credential
+        changes (e.g. an updated ``.netrc``) always take effect.
+        """
+        if self._clients is None:
+            return HyP3(username=username, password=password)
+        key = (username, password)
+        if key not in self._clients:
+            self._clients[key] = HyP3(username=username, password=password)
+        return self._clients[key]
+
     def _hyp3_authorize(self, pool: dict[str, str] | None = None):
         """Authorize the HyP3 client."""
         self._has_asf_netrc = self._check_netrc(keyword='machine urs.earthdata.nasa.gov')
@@ -88,7 +102,7 @@ class Hyp3Base(Hyp3Processor):
                 self._username = input("Enter your ASF username: ")
                 self._password = getpass.getpass("Enter your ASF password: ")
                 try:
-                    self.client = HyP3(username=self._username, password=self._password)
+                    self.client = self._hyp3_client(self._username, self._password)
                 except AuthenticationError:
                     print(f"{Fore.RED}Authentication failed. Please check your credentials and try again.\n")
                     continue
@@ -100,7 +114,7 @@ class Hyp3Base(Hyp3Processor):
                 print(f"{Fore.GREEN}Credentials saved to {netrc_path}.\n")
                 break
         else:
-            self.client = HyP3()
+            self.client = self._hyp3_client()
             self._username, _, self._password = netrc.netrc(Path.home().joinpath(".netrc")).authenticators('urs.earthdata.nasa.gov')
         
         self._current_client_user = self._username
@@ -149,7 +163,7 @@ class Hyp3Base(Hyp3Processor):
                 
                 # Ensure client matches current pool user
                 if  self._current_client_user != username:
-                    self.client = HyP3(username=username, password=self._password_pool[self._user_index])
+                    self.client = self._hyp3_client(username, self._password_pool[self._user_index])
                     self._current_client_user = username
 
                 try:
@@ -188,7 +202,7 @@ class Hyp3Base(Hyp3Processor):
                             try:
                                 _u_next = self._username_pool[self._user_index]
                                 _p_next = self._password_pool[self._user_index]
-                                self.client = HyP3(username=_u_next, password=_p_next)
+                                self.client = self._hyp3_client(_u_next, _p_next)
                                 self._current_client_user = _u_next
                                 break
                             except AuthenticationError:
@@ -208,7 +222,7 @@ class Hyp3Base(Hyp3Processor):
         if self._auth_pool:
             for i, username in enumerate(self._username_pool):
                 try:
-                    tmp_client = HyP3(username=username, password=self._password_pool[i])
+                    tmp_client = self._hyp3_client(username, self._password_pool[i])
                     credits = tmp_client.check_credits()
                     print(f"{Fore.CYAN}Remaining credits for {username}: {credits}{Fore.RESET}")
                 except AuthenticationError:
@@ -245,7 +259,7 @@ class Hyp3Base(Hyp3Processor):
             print(f"{Fore.CYAN}{Style.BRIGHT}User: {username} ({len(data)} jobs){Style.RESET_ALL}")
             try: 
                 password = self._password_pool[self._username_pool.index(username)]
-                self.client = HyP3(username=username, password=password)
+                self.client = self._hyp3_client(username, password)
                 
                 if isinstance(data[0], Job):
                     batch_to_refresh = Batch(data)
@@ -10,8 +10,8 @@ class Hyp3_InSAR(Hyp3Base):
     description = "HyP3 InSAR GAMMA processing. Produces geocoded interferograms from Sentinel-1 SLC pairs."
     compatible_downloader = "S1_SLC"
     default_config = Hyp3_InSAR_Config
-    def __init__(self, config: Hyp3_InSAR_Config | None = None):
-        super().__init__(config)
+    def __init__(self, config: Hyp3_InSAR_Config | None = None, clients: dict | None = None):
+        super().__init__(config, clients=clients)
         # Fetch InSAR specific cost table
         try:
             self.cost = self.client.costs()['INSAR_GAMMA']['cost_table'][f'{self.config.looks}']
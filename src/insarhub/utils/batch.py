@@ -1,21 +1,47 @@
 import cdsapi
+import hashlib
 import numpy as np
-import multiprocessing
 import json
+import math
+import os
+import random
+import threading
 import time
 import re
 import zipfile
 import rasterio
-from rasterio.warp import transform_bounds
+import requests
 import logging
+import shutil
+import struct
 
+from collections import defaultdict
 from colorama import Fore
-from osgeo import gdal
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
+from pyproj import Transformer
+from rasterio.io import MemoryFile
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 from insarhub import Downloader, Processor
 from insarhub.utils import select_pairs
+
+# Acquisition date/time stamps in HyP3 product names, e.g. 20210305T141236
+_HYP3_DATE_RE = re.compile(r'(\d{8})T(\d{6})')
+# Zip members whose GeoTIFF footprint covers the interferogram
+_DEM_SUFFIXES = ('_dem.tif', '_unw_phase.tif')
+# TIFF field types read from a GeoTIFF IFD: SHORT, LONG, DOUBLE, LONG8
+_TIFF_TYPES = {3: ('H', 2), 4: ('I', 4), 12: ('d', 8), 16: ('Q', 8)}
+# ImageWidth, ImageLength, ModelPixelScale, ModelTiepoint, GeoKeyDirectory
+_GEOTIFF_TAGS = frozenset((256, 257, 33550, 33922, 34735))
+
+@lru_cache(maxsize=32)
+def _wgs84_transformer(crs: str) -> Transformer:
+    """Return a cached transformer from *crs* (WKT or ``EPSG:n``) to EPSG:4326 (one PROJ pipeline per CRS)."""
+    return Transformer.from_crs(crs, 'EPSG:4326', always_xy=True)
+
 def hyp3_insar_batch_check(
         root_dir: str,
         download : bool = False,
@@ -29,8 +55,12 @@ def hyp3_insar_batch_check(
     batch_path = Path(root_dir).expanduser().resolve()
     json_files = batch_path.rglob('*.json')
 
+    # Processors in this check share one HyP3 session per Earthdata account, so
+    # only the first job file of each account pays for the login
+    clients = {}
     for file in json_files:
-        job = Processor.create('Hyp3_InSAR', saved_job_path=file, earthdata_credentials_pool=earthdata_credentials_pool)
+        job = Processor.create('Hyp3_InSAR', saved_job_path=file, earthdata_credentials_pool=earthdata_credentials_pool,
+                               init_kwargs={'clients': clients})
         b = json.loads(file.read_text())
         print(f"Overview for job {Path(b['out_dir'])}")
         if not download :
@@ -87,13 +117,20 @@ def dis_scan(
             max_degree=5,
             force_connect=True
             )
+    # Create every output folder up front so the submission loop does no filesystem work
+    slc_paths = {
+        key: output_dir.joinpath(f"quicklook_p{key[0]}f{key[1]}")
+        for key, pair in pairs.items() if len(pair) > 10
+    }
+    for slc_path in slc_paths.values():
+        slc_path.mkdir(parents=True, exist_ok=True)
+
     for key, pair in tqdm(pairs.items(), desc=f'Working on batch', position=0, leave=True):
-        if len(pair) <= 10:
+        if key not in slc_paths:
             print(f"{Fore.YELLOW}Not enough pairs found for a decent displacement analysis for Path{key[0]} Frame{key[1]}, skip the scene.")
             continue
-        slc_path = output_dir.joinpath(f"quicklook_p{key[0]}f{key[1]}")
-        slc_path.mkdir(parents=True, exist_ok=True)
-        
+        slc_path = slc_paths[key]
+
         job =Processor.create(processor,
             pairs=pair,
             out_dir=slc_path.as_posix(),
@@ -120,6 +157,34 @@ class ERA5Downloader:
         '975', '1000'
     ]
 
+    # Bytes read from the start of a GeoTIFF member to recover its georeferencing.
+    TIFF_HEADER_BYTES = 64 * 1024
+
+    # Processes used to scan zip metadata, and zips handed to each per round trip.
+    SCAN_WORKERS = min(8, os.cpu_count() or 1)
+    SCAN_CHUNKSIZE = 8
+
+    # GDAL options shared by every /vsizip/ open during the metadata scan.
+    # EMPTY_DIR stops GDAL from listing the archive for sidecar files on each open.
+    GDAL_ENV = {
+        'GDAL_CACHEMAX': 256,
+        'VSI_CACHE': 'TRUE',
+        'VSI_CACHE_SIZE': 25 * 1024 * 1024,
+        'CPL_VSIL_CURL_CACHE_SIZE': 16 * 1024 * 1024,
+        'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    }
+
+    # GRIB transfers are large and sequential; stream them in 1 MiB blocks.
+    CHUNK_SIZE = 1 << 20
+    # Resume offset is checkpointed every 4 MiB while a GRIB is being written.
+    CHECKPOINT_SIZE = 4 << 20
+    # Upper bound in seconds on the CDS client's job-status polling interval. The
+    # client backs off up to 120 s by default, which can leave a finished job idle.
+    POLL_SLEEP_MAX = 20
+    # Retry waits grow from 5 s, doubling per attempt, up to 60 s before jitter.
+    RETRY_BASE = 5
+    RETRY_CAP = 60
+
     def __init__(self, output_dir=None, num_processes=3, max_retries=3):
         self.output_dir = Path(output_dir).expanduser().resolve() if output_dir else None
         if self.output_dir:
@@ -127,100 +192,442 @@ class ERA5Downloader:
         self.num_processes = num_processes
         self.max_retries = max_retries
         
-        # Internal client holder for workers
-        self._worker_client = None
+        # Per-thread CDS client holder for download workers
+        self._local = threading.local()
+        # HTTP session shared by all GRIB transfers of a batch
+        self._session = None
+        # Content-addressed store of downloaded GRIBs, keyed by CDS request
+        self._cache_dir = None
+        # Cached GRIB path -> outputs of later folders waiting on that request
+        self._followers = {}
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _get_round_hour(time_str):
         """Rounds HHMMSS to the nearest whole hour."""
-        h = int(time_str[0:2])
-        m = int(time_str[2:4])
-        s = int(time_str[4:6])
-
-        if m > 30 or (m == 30 and s > 0):
-            h += 1
-        if h == 24:
-            h = 0
-        return f"{h:02d}"
+        h, ms = divmod(int(time_str), 10000)
+        # Round up past HH:30:00; MMSS compares as a plain integer.
+        return f"{(h + (ms > 3000)) % 24:02d}"
 
     @staticmethod
     def _calculate_snwe(snwe, min_buffer=2, step=10):
         """Calculates buffered bounding box in multiples of 'step'."""
-        def ceil2multiple(x, s):
-            return x if x % s == 0 else x + (s - x % s)
-
-        def floor2multiple(x, s):
-            return x - x % s
-
+        # Scalar inputs: math.floor/ceil return ints directly, without NumPy scalar boxing
         s_orig, n_orig, w_orig, e_orig = snwe
-        S = np.floor(min(s_orig, n_orig) - min_buffer)
-        N = np.ceil(max(s_orig, n_orig) + min_buffer)
-        W = np.floor(min(w_orig, e_orig) - min_buffer)
-        E = np.ceil(max(w_orig, e_orig) + min_buffer)
+        S = math.floor(min(s_orig, n_orig) - min_buffer)
+        N = math.ceil(max(s_orig, n_orig) + min_buffer)
+        W = math.floor(min(w_orig, e_orig) - min_buffer)
+        E = math.ceil(max(w_orig, e_orig) + min_buffer)
 
         if step > 1:
-            S, W = floor2multiple(S, step), floor2multiple(W, step)
-            N, E = ceil2multiple(N, step), ceil2multiple(E, step)
+            # Integer floor/ceil to a multiple of step: x // s * s and -(-x // s) * s
+            S, W = S // step * step, W // step * step
+            N, E = -(-N // step) * step, -(-E // step) * step
 
         return (int(S), int(N), int(W), int(E))
 
     @staticmethod
-    def _get_mintpy_filename(output_dir, day, hr, snwe):
-        """Generates MintPy-compliant filename: ERA5_S10_N20_W120_E110_YYYYMMDD_HH.grb"""
+    def _area_str(snwe):
+        """Area part of MintPy ERA5 filenames, e.g. ``_S10_N20_W120_E110`` (ERA5_S10_N20_W120_E110_YYYYMMDD_HH.grb)."""
         s, n, w, e = snwe
-        def fmt(val):
-            return f"{'S' if val < 0 else 'N'}{abs(val)}" if val == s or val == n \
-                   else f"{'W' if val < 0 else 'E'}{abs(val)}"
-        
-        # Note: MintPy logic often uses N/S for lat and W/E for lon
-        area_str = f"_{fmt(s)}_{fmt(n)}_{fmt(w)}_{fmt(e)}"
-        return Path(output_dir) / f"ERA5{area_str}_{day}_{hr}.grb"
+        # Note: MintPy logic uses N/S for lat and W/E for lon
+        return (f"_{'S' if s < 0 else 'N'}{abs(s)}_{'S' if n < 0 else 'N'}{abs(n)}"
+                f"_{'W' if w < 0 else 'E'}{abs(w)}_{'W' if e < 0 else 'E'}{abs(e)}")
 
-    def _prepare_cds_payload(self, day, hr, snwe_tuple):
-        """Formats the dictionary for the CDS API request."""
+    def _base_payload(self, snwe_tuple):
+        """CDS request fields shared by every request of an area; merge with :meth:`_time_fields`."""
         S, N, W, E = snwe_tuple
         return {
             'product_type': ['reanalysis'],
             'variable': ['geopotential', 'temperature', 'specific_humidity'],
-            'year': [day[0:4]],
-            'month': [day[4:6]],
-            'day': [day[6:8]],
-            'time': [f'{hr}:00'],
             'pressure_level': self.PRESSURE_LEVELS,
             'data_format': 'grib',
             'area': [N, W, S, E],  # CDS format: North, West, South, East
         }
 
-    @classmethod
-    def _worker_init(cls):
-        """Initializer for multiprocessing pool to create a per-process CDS client."""
-        global _client
-        _client = cdsapi.Client(progress=False, quiet=True)
-        logger = logging.getLogger('cdsapi')
-        logger.setLevel(logging.WARNING)
+    @staticmethod
+    def _time_fields(days, hrs):
+        """CDS time selection for *days* (``YYYYMMDD``, one month) x *hrs* (``HH``); CDS returns every combination."""
+        return {
+            'year': [days[0][0:4]],
+            'month': [days[0][4:6]],
+            'day': [day[6:8] for day in days],
+            'time': [f'{hr}:00' for hr in hrs],
+        }
+
+    def _cache_path(self, dataset):
+        """Content-addressed location of the GRIB for a CDS request in the batch cache."""
+        digest = hashlib.blake2b(json.dumps(dataset, sort_keys=True).encode(), digest_size=8).hexdigest()
+        return self._cache_dir / f'{digest}.grb'
 
     @staticmethod
-    def _download_worker(task_info):
-        """The actual download function executed by the worker process."""
-        global _client
-        dataset = task_info['dataset']
+    def _link(src, dst):
+        """Hard-link *src* to *dst*, copying instead where links are not supported."""
+        dst = Path(dst)
+        if dst.exists():
+            return
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+    @staticmethod
+    def _split_grib_by_time(grib_path, dest_paths):
+        """Split a multi-time GRIB file into one file per reference time.
+
+        GRIB messages are self-contained, so each one is copied verbatim to the file
+        of its ``(YYYYMMDD, HH)`` reference time. Editions 1 and 2 are supported.
+
+        Args:
+            grib_path (Path): GRIB file holding several days/hours.
+            dest_paths (dict): Maps ``(day, hr)`` to the output path of that time step.
+
+        Raises:
+            ValueError: If the file is malformed or a requested time step is missing.
+        """
+        data = Path(grib_path).read_bytes()
+        messages = {key: [] for key in dest_paths}
+        pos = data.find(b'GRIB')
+        while pos != -1:
+            edition = data[pos + 7]
+            if edition == 1:
+                length = int.from_bytes(data[pos + 4:pos + 7], 'big')
+                if length & 0x800000:
+                    raise ValueError(f"Unsupported large GRIB1 message in {grib_path}")
+                pds = pos + 8
+                year = (data[pds + 24] - 1) * 100 + data[pds + 12]
+                month, day, hour = data[pds + 13], data[pds + 14], data[pds + 15]
+            elif edition == 2:
+                length = int.from_bytes(data[pos + 8:pos + 16], 'big')
+                ids = pos + 16
+                year = int.from_bytes(data[ids + 12:ids + 14], 'big')
+                month, day, hour = data[ids + 14], data[ids + 15], data[ids + 16]
+            else:
+                raise ValueError(f"Unknown GRIB edition {edition} in {grib_path}")
+
+            key = (f'{year:04d}{month:02d}{day:02d}', f'{hour:02d}')
+            if key in messages:
+                messages[key].append(data[pos:pos + length])
+            pos = data.find(b'GRIB', pos + length)
+
+        missing = [key for key, chunks in messages.items() if not chunks]
+        if missing:
+            raise ValueError(f"{grib_path} has no fields for {', '.join('_'.join(k) for k in missing)}")
+        for key, chunks in messages.items():
+            part_path = Path(dest_paths[key]).with_name(Path(dest_paths[key]).name + '.part')
+            part_path.write_bytes(b''.join(chunks))
+            os.replace(part_path, dest_paths[key])
+
+    def _get_client(self):
+        """Return the CDS client of the calling worker thread, creating it on first use."""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            # Polling is a blocking sleep/GET loop, so a thread per in-flight job costs
+            # little; capping the interval hands finished jobs to the transfer pool sooner
+            client = cdsapi.Client(progress=False, quiet=True, sleep_max=self.POLL_SLEEP_MAX)
+            logging.getLogger('cdsapi').setLevel(logging.WARNING)
+            self._local.client = client
+        return client
+
+    @classmethod
+    def _stream_download(cls, result, dest_path, session=None):
+        """Stream a finished CDS result to disk with large sequential writes.
+
+        Data is staged in ``<dest>.part`` and the byte offset is checkpointed to
+        ``<dest>.part.idx`` every ``CHECKPOINT_SIZE`` bytes, so a retry resumes
+        with an HTTP range request instead of starting over. The checkpoint records
+        the URL it belongs to; a partial file from another URL (a resubmitted CDS
+        job) is discarded. The file is only renamed to ``dest_path`` once complete.
+
+        Falls back to cdsapi's own ``Result.download`` when the result does not
+        expose a download URL. Pass *session* to reuse pooled connections.
+        """
+        url = getattr(result, 'location', None)
+        if not url:
+            result.download(dest_path)
+            return
+
+        dest_path = Path(dest_path)
+        part_path = dest_path.with_name(dest_path.name + '.part')
+        idx_path = dest_path.with_name(dest_path.name + '.part.idx')
+
+        state = {}
+        if part_path.exists() and idx_path.exists():
+            try:
+                state = json.loads(idx_path.read_text())
+            except ValueError:
+                state = {}
+        # Bytes staged for a different download must not be spliced into this one
+        offset = state.get('offset', 0) if state.get('url') == url else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if state.get('etag'):
+                # Server falls back to a full 200 response if the object changed
+                headers['If-Range'] = state['etag']
+
+        with (session or requests).get(url, stream=True, headers=headers, timeout=(30, 600)) as resp:
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                offset = 0
+            length = int(resp.headers.get('Content-Length') or 0)
+            size = offset + length if length else 0
+            etag = resp.headers.get('ETag')
+
+            with open(part_path, 'r+b' if offset else 'wb', buffering=cls.CHUNK_SIZE) as f:
+                if not offset and size and hasattr(os, 'posix_fallocate'):
+                    # Reserve the extent up front so the filesystem can lay it out contiguously
+                    os.posix_fallocate(f.fileno(), 0, size)
+                f.seek(offset)
+                written = checkpoint = offset
+                for chunk in resp.iter_content(chunk_size=cls.CHUNK_SIZE):
+                    written += f.write(chunk)
+                    if written - checkpoint >= cls.CHECKPOINT_SIZE:
+                        f.flush()
+                        idx_path.write_text(json.dumps({'url': url, 'offset': written, 'etag': etag}))
+                        checkpoint = written
+
+        if size and written != size:
+            raise IOError(f"Incomplete download for {dest_path}: {written} of {size} bytes")
+        os.replace(part_path, dest_path)
+        idx_path.unlink(missing_ok=True)
+
+    def _retrieve(self, task_info):
+        """Submit the CDS request of *task_info* and block until its result is ready."""
+        return self._get_client().retrieve('reanalysis-era5-pressure-levels', task_info['dataset'])
+
+    def _request_worker(self, task_info, transfer_pool):
+        """Wait on the CDS queue for one request, then hand its transfer to *transfer_pool*.
+
+        Request slots are only held while CDS prepares the file, so a slot moves on to
+        the next request while the GRIB is still streaming. Returns the transfer future.
+        """
+        try:
+            result = self._retrieve(task_info)
+        except Exception:
+            # The transfer worker resubmits and applies the retry policy
+            result = None
+        return transfer_pool.submit(self._download_worker, task_info, result)
+
+    @classmethod
+    def _retry_delay(cls, attempt, error=None):
+        """Seconds to wait before retry *attempt* + 1.
+
+        Honours a numeric ``Retry-After`` from a 429/5xx response, up to ``RETRY_CAP``;
+        otherwise uses capped exponential backoff jittered to 50-150 % so parallel workers do not retry together.
+        """
+        response = getattr(error, 'response', None)
+        if response is not None and (response.status_code == 429 or response.status_code >= 500):
+            try:
+                return min(cls.RETRY_CAP, float(response.headers['Retry-After']))
+            except (KeyError, ValueError):
+                pass
+        return min(cls.RETRY_CAP, cls.RETRY_BASE * 2 ** (attempt - 1)) * (0.5 + random.random())
+
+    def _download_worker(self, task_info, result=None):
+        """Download, split and cache one CDS request, retrying up to ``max_retries`` times.
+
+        *result* is an already completed CDS job; without it the request is submitted here.
+        """
         dest_path = task_info['dest_path']
-        max_retries = task_info['max_retries']
+        max_retries = self.max_retries
 
+        last_error = None
         for attempt in range(1, max_retries + 1):
             try:
-                result = _client.retrieve('reanalysis-era5-pressure-levels', dataset)
-                result.download(dest_path)
+                # A finished CDS job is kept across retries so only the transfer is repeated
+                if result is None:
+                    result = self._retrieve(task_info)
+                self._stream_download(result, dest_path, session=self._session)
+                if task_info.get('splits'):
+                    try:
+                        self._split_grib_by_time(dest_path, task_info['splits'])
+                    except ValueError as e:
+                        # A malformed or unexpected GRIB stays that way; downloading
+                        # the whole month again would not help
+                        return f"ERROR: {dest_path} could not be split by time: {e}"
+                    Path(dest_path).unlink()
+                for output_path, cached in task_info.get('cache_paths', {}).items():
+                    self._link(output_path, cached)
+                    # Serve folders that asked for the same request as soon as it lands;
+                    # followers queued after this point are linked at the end of the batch
+                    for follower in list(self._followers.get(cached, ())):
+                        self._link(cached, follower)
                 return Path(dest_path).name
+            except requests.HTTPError as e:
+                # The download link was rejected (e.g. expired); submit the request again
+                result = None
+                last_error = e
             except Exception as e:
-                if attempt == max_retries:
-                    return f"ERROR: {dest_path} failed after {max_retries} attempts: {str(e)}"
-                time.sleep(min(60, 5 * attempt))
+                last_error = e
+            if attempt < max_retries:
+                time.sleep(self._retry_delay(attempt, last_error))
+        return f"ERROR: {dest_path} failed after {max_retries} attempts: {last_error}"
+
+    @staticmethod
+    def _bounds_from_metadata(text):
+        """Extract ``(west, south, east, north)`` from a HyP3 ``.tif.xml`` metadata sidecar, or None."""
+        values = {}
+        for tag in ('westBL', 'southBL', 'eastBL', 'northBL'):
+            m = re.search(rf'<{tag}>\s*(-?[\d.]+)\s*</{tag}>', text)
+            if m is None:
+                return None
+            values[tag] = float(m.group(1))
+        return values['westBL'], values['southBL'], values['eastBL'], values['northBL']
+
+    @staticmethod
+    def _geotiff_bounds(header):
+        """Read native-CRS bounds and EPSG code from the first IFD of a GeoTIFF header.
+
+        Only the size, pixel-scale, tiepoint and GeoKey tags are decoded, so no GDAL
+        dataset is opened. Classic TIFF and BigTIFF in either byte order are supported.
+
+        Args:
+            header (bytes): Leading bytes of the GeoTIFF file.
+
+        Returns:
+            tuple: ``((left, bottom, right, top), epsg)``, or None if the header is not a
+            north-up GeoTIFF with an EPSG code whose tags all fit in *header*.
+        """
+        bo = {b'II': '<', b'MM': '>'}.get(header[:2])
+        if bo is None or len(header) < 16:
+            return None
+        magic, = struct.unpack_from(bo + 'H', header, 2)
+        if magic == 42:
+            ifd, = struct.unpack_from(bo + 'I', header, 4)
+            count_fmt, entry_fmt, entry_size, inline = 'H', 'HHII', 12, 4
+        elif magic == 43:
+            ifd, = struct.unpack_from(bo + 'Q', header, 8)
+            count_fmt, entry_fmt, entry_size, inline = 'Q', 'HHQQ', 20, 8
+        else:
+            return None
+
+        tags = {}
+        try:
+            n_entries, = struct.unpack_from(bo + count_fmt, header, ifd)
+            start = ifd + struct.calcsize(bo + count_fmt)
+            for i in range(n_entries):
+                pos = start + i * entry_size
+                tag, typ, count, value = struct.unpack_from(bo + entry_fmt, header, pos)
+                if tag not in _GEOTIFF_TAGS or typ not in _TIFF_TYPES:
+                    continue
+                code, size = _TIFF_TYPES[typ]
+                # Small values are stored in the entry itself, larger ones at an offset
+                data_pos = pos + entry_size - inline if count * size <= inline else value
+                tags[tag] = struct.unpack_from(f'{bo}{count}{code}', header, data_pos)
+        except struct.error:
+            # IFD or tag data lies beyond the header bytes
+            return None
+        if not _GEOTIFF_TAGS <= tags.keys():
+            return None
+
+        width, height = tags[256][0], tags[257][0]
+        sx, sy = tags[33550][:2]
+        col, row, _, x, y, _ = tags[33922][:6]
+        keys = tags[34735]
+        # Directory header is 4 shorts, then (id, location, count, value) per key;
+        # location 0 means the value is stored inline
+        geokeys = {
+            keys[k]: keys[k + 3]
+            for k in range(4, min(len(keys) - 3, 4 + 4 * keys[3]), 4)
+            if keys[k + 1] == 0
+        }
+        epsg = geokeys.get(3072) or geokeys.get(2048)
+        if not epsg or epsg == 32767:
+            # User-defined CRS: needs the full GDAL/PROJ definition
+            return None
+        if geokeys.get(1025) == 2:
+            # RasterPixelIsPoint: the tiepoint is a pixel centre
+            x, y = x - sx / 2, y + sy / 2
+
+        left, top = x - col * sx, y + row * sy
+        return (left, top - height * sy, left + width * sx, top), epsg
+
+    @staticmethod
+    def _find_member(z, stem, suffixes):
+        """Name of a member of *z* ending in one of *suffixes*, or None.
+
+        HyP3 stores members as ``<stem>/<stem><suffix>``, so those names are tried first
+        with direct lookups in the parsed central directory; other layouts fall back to
+        scanning every member name.
+        """
+        for suffix in suffixes:
+            name = f'{stem}/{stem}{suffix}'
+            try:
+                z.getinfo(name)
+                return name
+            except KeyError:
+                pass
+        return next((f for f in z.namelist() if f.endswith(suffixes)), None)
+
+    @staticmethod
+    def _list_zips(folder):
+        """List the ``.zip`` files in *folder* from a single directory read."""
+        with os.scandir(folder) as it:
+            return [Path(e.path) for e in it if e.name.endswith('.zip') and e.is_file()]
+
+    @classmethod
+    def _scan_zip(cls, zip_path):
+        """Read acquisition dates and WGS84 bounds from a single HyP3 zip.
+
+        Returns:
+            tuple: ``(dates, bounds)`` where *dates* is a set of ``YYYYMMDD_HH`` strings and
+            *bounds* is ``(west, south, east, north)``, or None if no raster geometry was found.
+        """
+        # Dates come from the file name alone; a zip without HyP3 time stamps is
+        # not an interferogram product, so it is skipped before any I/O
+        dates = {f'{d}_{cls._get_round_hour(t)}' for d, t in _HYP3_DATE_RE.findall(zip_path.name)}
+        if not dates:
+            return dates, None
+        try:
+            # One descriptor and one central-directory parse serve every read below
+            with open(zip_path, 'rb') as fh, zipfile.ZipFile(fh, 'r') as z:
+                stem = zip_path.stem
+
+                # Prefer the small ArcGIS metadata sidecar; it already carries a WGS84 bbox
+                xml_file = cls._find_member(z, stem, ('_unw_phase.tif.xml', '_dem.tif.xml'))
+                if xml_file:
+                    bounds = cls._bounds_from_metadata(z.read(xml_file).decode('utf-8', errors='ignore'))
+                    if bounds is not None:
+                        return dates, bounds
+
+                # Extract Spatial Bounds from the GeoTIFF tags
+                dem_file = cls._find_member(z, stem, _DEM_SUFFIXES)
+                if dem_file:
+                    # HyP3 GeoTIFFs are cloud optimized, so the georeferencing tags
+                    # sit at the front; decode them straight from the zip stream.
+                    with z.open(dem_file) as member:
+                        header = member.read(cls.TIFF_HEADER_BYTES)
+                    parsed = cls._geotiff_bounds(header)
+                    if parsed is not None:
+                        (l, b, r, t), epsg = parsed
+                        if epsg == 4326:
+                            return dates, (l, b, r, t)
+                        return dates, _wgs84_transformer(f'EPSG:{epsg}').transform_bounds(l, b, r, t)
+
+                    # Uncommon layout: fall back to GDAL
+                    # rasterio environments are per thread, so each call opens its own
+                    with rasterio.Env(**cls.GDAL_ENV):
+                        try:
+                            with MemoryFile(header) as mem, mem.open() as src:
+                                l, b, r, t = src.bounds
+                                crs = src.crs
+                        except Exception:
+                            # Tags beyond the header: let GDAL read the member itself
+                            with rasterio.open(f"/vsizip/{zip_path.as_posix()}/{dem_file}") as src:
+                                l, b, r, t = src.bounds
+                                crs = src.crs
+                    return dates, _wgs84_transformer(crs.to_wkt()).transform_bounds(l, b, r, t)
+        except Exception:
+            pass
+        return dates, None
 
     def download_batch(self, batch_dir):
         """Scan a directory of HyP3 zip files, determine required ERA5 dates and extents, and download missing files.
 
         Already-downloaded files are skipped automatically, so the method is safe to re-run after an interrupted download.
+        Each GRIB is also hard-linked into a content-addressed ``.cds_cache`` folder, so identical requests
+        from overlapping subfolders are linked from the cache instead of being downloaded again.
 
         Args:
             batch_dir (str): Directory containing HyP3 `.zip` files. Subdirectories are scanned if no zips are found directly.
@@ -230,81 +637,168 @@ class ERA5Downloader:
         """
         batch_path = Path(batch_dir).expanduser().resolve()
 
-        # If zips are directly in batch_dir, treat it as a single group
-        direct_zips = list(batch_path.glob('*.zip'))
+        # If zips are directly in batch_dir, treat it as a single group.
+        # scandir entries carry the file type, so no per-entry stat is needed.
+        with os.scandir(batch_path) as it:
+            entries = list(it)
+        direct_zips = [Path(e.path) for e in entries if e.name.endswith('.zip') and e.is_file()]
         folders_to_scan = [batch_path] if direct_zips else [
-            s for s in batch_path.iterdir() if s.is_dir()
+            Path(e.path) for e in entries if e.is_dir()
         ]
 
-        for subfolder in tqdm(folders_to_scan, desc="Folders", position=0):
-            zip_files = list(subfolder.glob('*.zip'))
-            if not zip_files:
-                continue
-
-            W, E, N, S = 180, -180, -90, 90
-            dates = set()
-            valid_files_count = 0
-
-            # 1. Scan Metadata from Zips
-            for zip_path in tqdm(zip_files, desc=f"Scanning {subfolder.name[:10]}...", leave=False, position=1):
-                try:
-                    with zipfile.ZipFile(zip_path, 'r') as z:
-                        namelist = z.namelist()
-                        
-                        # Extract Dates
-                        date_match = re.findall(r'(\d{8})T(\d{6})', zip_path.name)
-                        for d, t in date_match:
-                            dates.add(f'{d}_{self._get_round_hour(t)}')
-
-                        # Extract Spatial Bounds using GDAL Virtual File System
-                        dem_file = next((f for f in namelist if '_dem.tif' in f or '_unw_phase.tif' in f), None)
-                        if dem_file:
-                            vsi_path = f"/vsizip/{zip_path.as_posix()}/{dem_file}"
-                            with rasterio.open(vsi_path) as src:
-                                l, b, r, t = src.bounds
-                                wgs = transform_bounds(src.crs, 'EPSG:4326', l, b, r, t)
-                                W, S, E, N = min(W, wgs[0]), min(S, wgs[1]), max(E, wgs[2]), max(N, wgs[3])
-                                valid_files_count += 1
-                except Exception:
+        self._cache_dir = (self.output_dir or batch_path) / '.cds_cache'
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # List every folder first so the whole batch is scanned in one pass
+        folder_zips = [
+            (subfolder, direct_zips if subfolder == batch_path else self._list_zips(subfolder))
+            for subfolder in folders_to_scan
+        ]
+        all_zips = [zip_path for _, zip_files in folder_zips for zip_path in zip_files]
+
+        # 1. Scan Metadata from Zips. Zip parsing and the XML/regex work hold the GIL,
+        # so the scan runs in worker processes. It runs before any download thread
+        # exists, which keeps forking the workers safe.
+        scans = []
+        with ProcessPoolExecutor(max_workers=self.SCAN_WORKERS) as scan_pool, \
+                tqdm(total=len(all_zips), desc="Scanning", unit="zip",
+                     miniters=max(1, len(all_zips) // 200), mininterval=0.5) as scan_bar:
+            for result in scan_pool.map(self._scan_zip, all_zips, chunksize=self.SCAN_CHUNKSIZE):
+                scans.append(result)
+                scan_bar.update(1)
+
+        # One pooled HTTP session keeps TLS connections to the CDS download
+        # servers alive across every subfolder of the batch.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.num_processes, pool_maxsize=self.num_processes
+        )
+        self._session.mount('https://', adapter)
+
+        # One download pool serves the whole batch: worker threads and their CDS
+        # clients are created once instead of once per subfolder.
+        futures = []
+        queued = self._followers = defaultdict(list)
+        offset = 0
+        with self._session, \
+                ThreadPoolExecutor(max_workers=self.num_processes) as transfer_pool, \
+                ThreadPoolExecutor(max_workers=self.num_processes) as pool:
+            for subfolder, zip_files in folder_zips:
+                if not zip_files:
+                    continue
+
+                # Results come back in input order, so each folder owns a contiguous slice
+                folder_scans = scans[offset:offset + len(zip_files)]
+                offset += len(zip_files)
+                dates = set()
+                bounds = []
+                for zip_dates, wgs in folder_scans:
+                    dates |= zip_dates
+                    if wgs is not None:
+                        bounds.append(wgs)
+
+                if not bounds:
+                    print(f"{Fore.RED}No geometry found in {subfolder.name}")
                     continue
 
-            if valid_files_count == 0:
-                print(f"{Fore.RED}No geometry found in {subfolder.name}")
-                continue
-
-            # 2. Prepare Download Tasks
-            snwe_tuple = self._calculate_snwe((S, N, W, E))
-            era5_out = self.output_dir if self.output_dir else subfolder
-            era5_out.mkdir(parents=True, exist_ok=True)
-            tasks = []
-            for date_str in sorted(dates):
-                day, hr = date_str.split('_')
-                output_path = self._get_mintpy_filename(era5_out, day, hr, snwe_tuple)
-                
-                if output_path.exists():
+                # Union of all footprints: one reduction over the (n, 4) W/S/E/N array
+                bounds = np.asarray(bounds, dtype=np.float64)
+                W, S = bounds[:, :2].min(axis=0)
+                E, N = bounds[:, 2:].max(axis=0)
+
+                # 2. Prepare Download Tasks
+                snwe_tuple = self._calculate_snwe((S, N, W, E))
+                era5_out = self.output_dir if self.output_dir else subfolder
+                era5_out.mkdir(parents=True, exist_ok=True)
+                # The area part of the MintPy filename and request are fixed for the whole folder
+                area_str = self._area_str(snwe_tuple)
+                base_payload = self._base_payload(snwe_tuple)
+                # Group the missing time steps by month: CDS accepts lists of days and
+                # hours, so one request per month replaces one queue wait per acquisition.
+                by_month = defaultdict(lambda: defaultdict(set))
+                cache_paths = {}
+                for date_str in sorted(dates):
+                    day, hr = date_str.split('_')
+                    output_path = era5_out / f"ERA5{area_str}_{day}_{hr}.grb"
+                    if output_path.exists():
+                        continue
+                    # Identical requests from overlapping folders resolve to the same cache entry
+                    cached = self._cache_path(base_payload | self._time_fields([day], [hr]))
+                    if cached.exists():
+                        self._link(cached, output_path)
+                        continue
+                    if cached.as_posix() in queued:
+                        # Already requested by an earlier folder; link once that finishes
+                        queued[cached.as_posix()].append(output_path)
+                        continue
+                    queued[cached.as_posix()] = []
+                    cache_paths[output_path.as_posix()] = cached.as_posix()
+                    by_month[day[:6]][day].add(hr)
+
+                tasks = []
+                n_files = 0
+                for month, day_hrs in by_month.items():
+                    hr_sets = {frozenset(hrs) for hrs in day_hrs.values()}
+                    if len(day_hrs) > 1 and len(hr_sets) == 1:
+                        # Every day needs the same hours, so the day x time product is exact
+                        days, hrs = sorted(day_hrs), sorted(hr_sets.pop())
+                        splits = {
+                            (day, hr): era5_out / f"ERA5{area_str}_{day}_{hr}.grb"
+                            for day in days for hr in hrs
+                        }
+                        dataset = base_payload | self._time_fields(days, hrs)
+                        tasks.append({
+                            'dataset': dataset,
+                            # Staged in the cache under its own hash; removed once split
+                            'dest_path': self._cache_path(dataset).with_suffix('.month.grb').as_posix(),
+                            'splits': splits,
+                            'cache_paths': {p.as_posix(): cache_paths[p.as_posix()] for p in splits.values()}
+                        })
+                        n_files += len(splits)
+                        continue
+
+                    # Hours differ between days: fall back to one request per time step
+                    for day, hrs in sorted(day_hrs.items()):
+                        for hr in sorted(hrs):
+                            output_path = (era5_out / f"ERA5{area_str}_{day}_{hr}.grb").as_posix()
+                            tasks.append({
+                                'dataset': base_payload | self._time_fields([day], [hr]),
+                                'dest_path': output_path,
+                                'cache_paths': {output_path: cache_paths[output_path]}
+                            })
+                            n_files += 1
+
+                # 3. Queue Downloads
+                if not tasks:
+                    print(f"{Fore.GREEN}All files exist for {subfolder.name}")
                     continue
 
-                tasks.append({
-                    'dataset': self._prepare_cds_payload(day, hr, snwe_tuple),
-                    'dest_path': output_path.as_posix(),
-                    'max_retries': self.max_retries
-                })
-
-            # 3. Execute Parallel Downloads
-            if not tasks:
-                print(f"{Fore.GREEN}All files exist for {subfolder.name}")
-                continue
-
-            tqdm.write(f"{Fore.CYAN}Downloading {len(tasks)} files for {subfolder.name}...")
-            with multiprocessing.Pool(processes=self.num_processes, initializer=self._worker_init) as pool:
-                with tqdm(total=len(tasks), desc="Progress", unit="file", leave=False) as pbar:
-                    for result in pool.imap_unordered(self._download_worker, tasks):
+                tqdm.write(f"{Fore.CYAN}Downloading {n_files} files in {len(tasks)} requests for {subfolder.name}...")
+                # CDS retrievals are spent waiting on the server queue and the network,
+                # so threads overlap them without forking a process per worker.
+                futures.extend(pool.submit(self._request_worker, task, transfer_pool) for task in tasks)
+
+            with tqdm(total=len(futures), desc="Downloading", unit="request",
+                      miniters=max(1, len(futures) // 200), mininterval=0.5) as pbar:
+                # Request futures resolve to transfer futures, which resolve to file names
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        result = fut.result()
+                        if isinstance(result, Future):
+                            pending.add(result)
+                            continue
                         if result.startswith("ERROR"):
                             pbar.write(f"{Fore.RED}{result}")
-                        else:
-                            pbar.set_postfix_str(f"Finished: {result}")
                         pbar.update(1)
 
+        # Followers queued after their request had already finished
+        for cached, output_paths in queued.items():
+            if Path(cached).exists():
+                for output_path in output_paths:
+                    self._link(cached, output_path)
+
         print(f"{Fore.MAGENTA}Batch Processing Complete.")
 
 
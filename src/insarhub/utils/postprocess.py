@@ -1,4 +1,7 @@
 
+import os
+
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
@@ -9,48 +12,69 @@ import re
 
 from rasterio.features import shapes
 from rasterio.transform import from_origin
+from rasterio.windows import Window
 from rasterio.crs import CRS
 from shapely.geometry import shape, Polygon, MultiPolygon, box
 from shapely.ops import unary_union
 
-
-def _transform_from_attrs(attrs):
-    A = {k.upper(): attrs[k] for k in attrs.keys()}
+# Rows read from HDF5 per write; matches the GeoTIFF block height so each
+# strip fills exactly one row of output tiles.
+_STRIP_ROWS = 256
+# HDF5 raw-data chunk cache for the input file; slots is a prime well above
+# the number of chunks that fit in the cache
+_H5_CHUNK_CACHE = 64 * 1024 * 1024
+_H5_CHUNK_SLOTS = 1_000_003
+
+# MintPy products h5_to_raster accepts; the set gives O(1) exact-name checks,
+# the tuple keeps the order for the substring fallback and the error message
+_VALID_H5_NAMES = ('ERA5', 'geomertryGeo', 'ifgramStack', 'velocity', 'velocityERA5', 'avgSpatialCoh',
+                   'demErr', 'maskConnComp', 'maskTempCoh', 'numInvIfgram', 'temporalCoherence', 'timeseries',
+                   'timeseriesResidual')
+_VALID_H5_SET = frozenset(_VALID_H5_NAMES)
+
+# Longest side (pixels) of the grid a footprint is traced on; larger rasters
+# are read decimated, from an overview when one exists
+_FOOTPRINT_MAX_SIZE = 2048
+
+# MintPy UTM_ZONE attribute: zone number with an optional hemisphere letter, e.g. '33N' or 33
+_UTM_ZONE_RE = re.compile(r'(\d+)([A-Za-z]?)')
+
+def _parse_attrs(attrs):
+    """Return ``(transform, crs, unit)`` from MintPy HDF5 attributes, upper-casing the keys once."""
+    A = {k.upper(): v for k, v in attrs.items()}
+    return _transform_from_attrs(A), _crs_from_attrs(A), _unit_from_attrs(A)
+
+def _transform_from_attrs(A):
     x0, y0 = float(A["X_FIRST"]), float(A["Y_FIRST"])
     dx, dy = float(A["X_STEP"]), float(A["Y_STEP"])
     T = from_origin(x0, y0, abs(dx), abs(dy))
     # force north-up (negative y pixel size)
     return rasterio.Affine(T.a, 0, T.c, 0, -abs(dy), T.f)
 
-def _crs_from_attrs(attrs):
-    A = {k.upper(): attrs[k] for k in attrs.keys()}
+def _crs_from_attrs(A):
     if "EPSG" in A:
         try: return CRS.from_epsg(int(A["EPSG"]))
         except: pass
     if "UTM_ZONE" in A:
-        if bool(re.fullmatch(r'\d+[A-Za-z]', A["UTM_ZONE"])): # e.g., '33N'
-            zone_str = A["UTM_ZONE"][-1]
-            zone_num = int(A["UTM_ZONE"][:-1])
-            if zone_str.upper() == 'N':
-                epsg = 32600 + zone_num
-            else:
-                epsg = 32700 + zone_num
-            return CRS.from_epsg(epsg)
-        elif bool(re.fullmatch(r'\d+', str(A["UTM_ZONE"]))): # e.g., 33
-            zone = int(A["UTM_ZONE"])
+        m = _UTM_ZONE_RE.fullmatch(str(A["UTM_ZONE"]))
+        if m is None:
+            return None
+        zone_num, zone_str = int(m.group(1)), m.group(2)
+        if zone_str: # e.g., '33N'
+            north = zone_str.upper() == 'N'
+        else: # e.g., 33
             lat = None
             for k in ("REF_LAT","LAT_REF1","LAT_REF2","LAT_REF3","LAT_REF4"):
                 if k in A:
                     try: lat = float(A[k]); break
                     except: pass
             north = (lat is None) or (lat >= 0.0)
-            epsg = 32600 + zone if north else 32700 + zone
-            return CRS.from_epsg(epsg)
+        return CRS.from_epsg(32600 + zone_num if north else 32700 + zone_num)
     return None
 
-def _unit_from_attrs(attrs):
-    for k in ("UNIT","UNIT_TYPE","units","Units"):
-        if k in attrs: return str(attrs[k])
+def _unit_from_attrs(A):
+    for k in ("UNIT","UNIT_TYPE","UNITS"):
+        if k in A: return str(A[k])
     return None
 
 def h5_to_raster(
@@ -60,6 +84,11 @@ def h5_to_raster(
     """
     Convert a HDF5 dataset from mintpy to GeoTIFF raster.
 
+    Outputs newer than the HDF5 file are left as they are. Freshness is judged
+    by modification time rather than a content hash, so checking is free; each
+    band is written under a temporary name and moved into place only once
+    complete, so an interrupted run never leaves a partial output to be skipped.
+
     Parameters:
     - h5_file: Path to the input HDF5 file.
     - out_raster: Path to the output GeoTIFF file.
@@ -69,49 +98,87 @@ def h5_to_raster(
         out_raster = h5_file.parent.joinpath(f"{h5_file.stem}.tif")
     else:
         out_raster = Path(out_raster).expanduser().resolve()
-    valid_name = ['ERA5','geomertryGeo', 'ifgramStack', 'velocity', 'velocityERA5', 'avgSpatialCoh', 
-                  'demErr', 'maskConnComp', 'maskTempCoh', 'numInvIfgram', 'temporalCoherence', 'timeseries',
-                  'timeseriesResidual']
-    with h5py.File(h5_file.as_posix(), 'r') as f:
+    # A chunk spans several 256-row strips; a 64 MiB chunk cache keeps it decoded
+    # until every strip has read it, instead of re-reading it per strip
+    with h5py.File(h5_file.as_posix(), 'r', rdcc_nbytes=_H5_CHUNK_CACHE, rdcc_nslots=_H5_CHUNK_SLOTS) as f:
         NODATA = -9999.0
         attrs = f.attrs
-        transform = _transform_from_attrs(attrs)
-        crs = _crs_from_attrs(attrs)
-        unit = _unit_from_attrs(attrs)
+        transform, crs, unit = _parse_attrs(attrs)
         if crs is None or transform is None:
             raise ValueError(f"Cannot extract CRS or Transform from HDF5 file attributes.") 
-        if h5_file.stem not in valid_name:
-            if all([h5_file.stem not in name for name in valid_name]):
-                raise ValueError(f"HDF5 file name {h5_file.stem} not in valid names: {valid_name}")
+        if h5_file.stem not in _VALID_H5_SET:
+            if not any(h5_file.stem in name for name in _VALID_H5_NAMES):
+                raise ValueError(f"HDF5 file name {h5_file.stem} not in valid names: {list(_VALID_H5_NAMES)}")
         if h5_file.stem == 'velocity':
             keys = ['velocity', 'velocityStd', 'residue']
+            nodata_in = float(attrs['NO_DATA_VALUE'])
+            h5_mtime = h5_file.stat().st_mtime
+            jobs = []
             for key in keys:
-                ref = f[key]
-                data = ref[()]
-                height, width = data.shape
-                data[data == float(attrs['NO_DATA_VALUE'])] = NODATA
-                bad = ~np.isfinite(data)
-                if bad.any():
-                    data[bad] = NODATA
-                profile = dict(driver="GTiff", height=height, width=width, count=1, dtype="float32",
-                           crs=crs, transform=transform, nodata=NODATA,
-                           tiled=True, compress="deflate", predictor=3,
-                           blockxsize=256, blockysize=256, BIGTIFF="IF_SAFER")
                 out_path = out_raster.with_name(f"{out_raster.stem}_{key}.tif")
-                with rasterio.Env(GDAL_TIFF_INTERNAL_MASK=True):
-                    with rasterio.open(out_path.as_posix(), 'w', **profile) as dst:
-                        dst.write(data, 1)
-                        tags = {"source": f"MintPy velocity.h5"}
-                        unit = unit
-                        if unit:
-                            tags["units"] = unit
-                        dst.update_tags(**tags)    
+                # Outputs written after the HDF5 was last modified are already current
+                if out_path.exists() and out_path.stat().st_mtime >= h5_mtime:
+                    continue
+                jobs.append((f[key], out_path))
+            # Deflate compression runs inside GDAL with the GIL released, so the
+            # three bands are written concurrently; the cores are split between
+            # them so GDAL does not start a full thread pool per band
+            n_threads = max(1, (os.cpu_count() or 1) // max(1, len(jobs)))
+            with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as pool:
+                list(pool.map(
+                    lambda job: _write_band(*job, crs, transform, nodata_in, NODATA, unit, n_threads),
+                    jobs,
+                ))
+
+
+def _write_band(ref, out_path, crs, transform, nodata_in, nodata_out, unit, num_threads=1):
+    """Stream one 2-D HDF5 dataset into a tiled, deflate-compressed GeoTIFF.
+
+    The band is written to ``<out_path>.part`` and renamed over *out_path* only
+    after it is closed. GDAL compresses tiles on *num_threads* threads.
+    """
+    height, width = ref.shape
+    profile = dict(driver="GTiff", height=height, width=width, count=1, dtype="float32",
+               crs=crs, transform=transform, nodata=nodata_out,
+               tiled=True, compress="deflate", predictor=3,
+               blockxsize=256, blockysize=256, BIGTIFF="IF_SAFER",
+               # deflate + predictor=3 is the write bottleneck; compress tiles in parallel
+               num_threads=str(num_threads))
+    # NODATA already marks invalid pixels, so no mask band is written.
+    # rasterio environments are per thread, so each band opens its own.
+    tmp_path = out_path.with_name(f"{out_path.name}.part")
+    with rasterio.Env(GDAL_NUM_THREADS=str(num_threads)):
+        with rasterio.open(tmp_path.as_posix(), 'w', **profile) as dst:
+            # Stream tile-high strips so peak memory is one strip,
+            # not the whole dataset
+            buf = np.empty((min(_STRIP_ROWS, height), width), dtype=np.float32)
+            bad_buf = np.empty(buf.shape, dtype=bool)
+            eq_buf = np.empty(buf.shape, dtype=bool)
+            for y in range(0, height, _STRIP_ROWS):
+                rows = min(_STRIP_ROWS, height - y)
+                strip, bad, eq = buf[:rows], bad_buf[:rows], eq_buf[:rows]
+                ref.read_direct(strip, source_sel=np.s_[y:y + rows, :])
+                # bad = ~isfinite | (== nodata), built in reused buffers
+                np.isfinite(strip, out=bad)
+                np.logical_not(bad, out=bad)
+                np.equal(strip, nodata_in, out=eq)
+                bad |= eq
+                np.copyto(strip, nodata_out, where=bad)
+                dst.write(strip, 1, window=Window(0, y, width, rows))
+            tags = {"source": f"MintPy velocity.h5"}
+            if unit:
+                tags["units"] = unit
+            dst.update_tags(**tags)
+    os.replace(tmp_path, out_path)
 
 
 def save_footprint(raster_file: str | Path, out_footprint: str | Path | None = None):
     """
     Save the footprint of a raster file as a binary mask GeoTIFF.
 
+    Rasters larger than ``_FOOTPRINT_MAX_SIZE`` pixels on a side are traced on
+    a decimated mask, so the outline is accurate to one decimated pixel.
+
     Parameters:
     - raster_file: Path to the input raster file.
     - out_footprint: Path to the output footprint GeoTIFF file.
@@ -123,20 +190,24 @@ def save_footprint(raster_file: str | Path, out_footprint: str | Path | None = N
         out_footprint = Path(out_footprint).expanduser().resolve()
 
     with rasterio.open(raster_file.as_posix(), 'r') as src:
-        data = src.read(1)
         crs = src.crs
-        transform = src.transform
-        count = src.count
+        # Trace the outline on a decimated grid; the transform is scaled to match
+        scale = max(1.0, max(src.width, src.height) / _FOOTPRINT_MAX_SIZE)
+        out_shape = (max(1, round(src.height / scale)), max(1, round(src.width / scale)))
+        transform = src.transform * rasterio.Affine.scale(src.width / out_shape[1],
+                                                          src.height / out_shape[0])
 
         if src.nodata is not None:
-            b1 = src.read(1)
-            valid_mask = b1 != src.nodata
-        else: 
-            b1 = src.read(1)
-            valid_mask = np.isfinite(b1)
+            # GDAL's mask band already encodes nodata; no need for the float band
+            valid_mask = src.read_masks(1, out_shape=out_shape) > 0
+        else:
+            valid_mask = np.isfinite(src.read(1, out_shape=out_shape))
 
         footprint = []
-        for geom, val in shapes(valid_mask.astype(np.uint8), mask=valid_mask, transform=transform):
+        # 8-connectivity merges diagonal pixel runs, so GDAL emits far fewer
+        # polygons for unary_union to dissolve
+        for geom, val in shapes(valid_mask.view(np.uint8), mask=valid_mask,
+                                connectivity=8, transform=transform):
             if val == 1:
                  poly = shape(geom)
                  if poly.area >0:
@@ -2,25 +2,32 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import copy
+import hashlib
+import importlib.util
+import heapq
 import json
+import random
 import re
 import time
 import logging
 import zipfile
 import shutil
+import stat
 
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from dateutil.parser import isoparse
 from pathlib import Path
 from typing import Optional, Union, List, Dict
-from threading import Lock
 
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.collections import LineCollection
 import networkx as nx
 import numpy as np
 import rasterio
@@ -40,6 +47,19 @@ logger = logging.getLogger(__name__)
 _MISSING: float = 10_000.0
 _WKT_MAX_LEN = 2000
 
+# geopandas I/O engine for vector files; None leaves geopandas' default
+_VECTOR_ENGINE = "pyogrio" if importlib.util.find_spec("pyogrio") else None
+
+# Resolution of saved interferogram network figures
+_NETWORK_DPI = 300
+
+# Upper bound (s) on a single stack-fetch retry wait
+_RETRY_WAIT_CAP = 30.0
+
+# Format tag mixed into baseline cache keys; bump when the table's content
+# or the way it is derived changes, so older cache files are ignored
+_BASELINE_CACHE_VERSION = 1
+
 # ═══════════════════════════════════════════════════════════════════════════
 #  TYPE ALIASES
 # ═══════════════════════════════════════════════════════════════════════════
@@ -97,16 +117,26 @@ def _has_local_baseline(p: ASFProduct) -> bool:
 
     ALOS / ERS / RADARSAT (PRE_CALCULATED type):
         p.baseline['insarBaseline'] (a scalar float) must exist.
+
+    The answer is stored on the product, so calling ``select_pairs`` again
+    on the same search results skips the dict walk.
     """
+    cached = getattr(p, "_has_local_bl", None)
+    if cached is not None:
+        return cached
     b = getattr(p, "baseline", None)
     if not b:
-        return False
-    if "stateVectors" in b:
+        result = False
+    elif "stateVectors" in b:
         sv = b["stateVectors"]
-        return bool(sv.get("positions") and sv.get("velocities"))
-    if "insarBaseline" in b:
-        return True
-    return False
+        result = bool(sv.get("positions") and sv.get("velocities"))
+    else:
+        result = "insarBaseline" in b
+    try:
+        p._has_local_bl = result
+    except AttributeError:
+        pass
+    return result
 
 
 def _fetch_stack_with_retry(
@@ -116,6 +146,11 @@ def _fetch_stack_with_retry(
     """
     Fetch the ASF stack for *ref* with exponential-backoff retry.
 
+    Each wait is drawn from an exponential distribution whose mean doubles
+    per attempt from 0.5 s, and is capped at 30 s, so concurrent API
+    fallback threads spread their retries and a transient blip never
+    stalls a thread for minutes.
+
     Returns (scene_name, stack_products).
     Raises ASFSearchError after *max_attempts* consecutive failures.
     """
@@ -129,7 +164,7 @@ def _fetch_stack_with_retry(
                     "Stack fetch failed for %s after %d attempts.", rid, max_attempts
                 )
                 raise
-            wait = 0.5 * 2 ** (attempt - 1)
+            wait = min(_RETRY_WAIT_CAP, random.expovariate(1.0 / (0.5 * 2 ** (attempt - 1))))
             logger.debug(
                 "Attempt %d failed for %s; retrying in %.1f s.", attempt, rid, wait
             )
@@ -159,10 +194,12 @@ def _build_baseline_table_local(
        separation and the common anchor cancels out.
 
     3. Temporal baseline is computed directly from pre-parsed Unix timestamps.
+
+    All pairs are evaluated at once with NumPy via :func:`_pairwise_from_anchor`.
     """
     B: BaselineTable = {}
     if not prods:
-        return B
+        return B, {}
 
     try:
         anchored = calculate_perpendicular_baselines(
@@ -179,26 +216,8 @@ def _build_baseline_table_local(
         )
         return B, {}
 
-    for i, a in enumerate(prods):
-        for b in prods[i + 1:]:
-            aid = a.properties["sceneName"]
-            bid = b.properties["sceneName"]
-            if aid not in ids or bid not in ids:
-                continue
-            # Temporal baseline in days
-            dt = abs(id_time_dt[bid] - id_time_dt[aid]) / 86_400.0
-            # Pairwise bperp = |bp_relative_to_anchor[B] - bp_relative_to_anchor[A]|
-            bp_a, bp_b = bp_vector.get(aid), bp_vector.get(bid)
-            bp = (
-                abs(bp_b - bp_a)
-                if (bp_a is not None and bp_b is not None)
-                else _MISSING
-            )
-
-            early, late = (
-                (aid, bid) if id_time_dt[aid] <= id_time_dt[bid] else (bid, aid)
-            )
-            B[(early, late)] = (dt, bp)
+    # Scenes without a bperp are kept, paired with the _MISSING sentinel
+    B = _pairwise_from_anchor(bp_vector, ids, id_time_dt, missing=_MISSING)
 
     logger.info(
         "Local baseline table: %d pairs from %d scenes.", len(B), len(prods)
@@ -210,27 +229,158 @@ def _build_baseline_table_local(
     return B, scene_bperp
 
 
+def _iso_timestamp(value: str) -> DateFloat:
+    """
+    Unix timestamp of an ISO-8601 string.
+
+    ``datetime.fromisoformat`` is C-implemented and accepts ASF's ``...Z``
+    timestamps on Python 3.11+; anything it rejects goes through ``isoparse``.
+    """
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return isoparse(value).timestamp()
+
+
+def _pairwise_from_anchor(
+    bp_vector: dict[SceneID, float | None],
+    ids: set[SceneID],
+    id_time_dt: dict[SceneID, DateFloat],
+    missing: float | None = None,
+) -> BaselineTable:
+    """
+    Build the pairwise table from per-scene bperp relative to one common anchor.
+
+    Pairwise bperp is ``|bp[A] - bp[B]|`` since the anchor cancels out, so
+    every pair is computed at once with NumPy instead of per-pair lookups.
+    Scenes outside *ids* are skipped.  Scenes without a bperp value are
+    skipped too, unless *missing* is given, in which case their pairs are
+    kept with bperp set to *missing*.
+    """
+    names = sorted(
+        (n for n, v in bp_vector.items()
+         if n in ids and (v is not None or missing is not None)),
+        key=id_time_dt.__getitem__,
+    )
+    if len(names) < 2:
+        return {}
+
+    t  = np.array([id_time_dt[n] for n in names], dtype=np.float64)
+    bp = np.array([bp_vector[n] for n in names], dtype=np.float64)  # None -> nan
+    # names are in time order, so (names[i], names[j]) with i < j is (early, late)
+    iu, ju = np.triu_indices(len(names), k=1)
+    dt  = np.abs(t[ju] - t[iu]) / 86_400.0
+    dbp = np.abs(bp[ju] - bp[iu])
+    if missing is not None:
+        dbp[np.isnan(dbp)] = missing
+    return {
+        (names[i], names[j]): (d, b)
+        for i, j, d, b in zip(iu.tolist(), ju.tolist(), dt.tolist(), dbp.tolist())
+    }
+
+
+def _baseline_cache_path(cache_dir: Path, api_ids: set[SceneID], ids: set[SceneID]) -> Path:
+    """Cache file under *cache_dir* for the API table of *api_ids* within the stack *ids*."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{_BASELINE_CACHE_VERSION}|".encode())
+    digest.update(",".join(sorted(api_ids)).encode())
+    digest.update(b"|")
+    digest.update(",".join(sorted(ids)).encode())
+    return cache_dir / f"{digest.hexdigest()}.json"
+
+
+def _load_cached_baselines(path: Path) -> BaselineTable | None:
+    """Return the table stored at *path*, or None if absent or unreadable."""
+    try:
+        rows = json.loads(path.read_text())
+        return {(a, b): (float(dt), float(bp)) for a, b, dt, bp in rows}
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _save_cached_baselines(path: Path, B: BaselineTable) -> None:
+    """Write *B* to *path* atomically; failures only cost the cache.
+
+    Tables holding ``_MISSING`` placeholders are not written, so scenes ASF
+    has no baseline for yet are fetched again on the next run.
+    """
+    if any(dt >= _MISSING or bp >= _MISSING for dt, bp in B.values()):
+        logger.debug("Baseline table has missing entries; not caching it.")
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps([[a, b, dt, bp] for (a, b), (dt, bp) in B.items()]))
+        tmp.replace(path)
+    except OSError as exc:
+        logger.debug("Could not cache baseline table at %s: %s", path, exc)
+
+
 def _build_baseline_table_api(
     prods: list[ASFProduct],
     ids: set[SceneID],
     id_time_dt: dict[SceneID, DateFloat],
     max_workers: int,
+    cache_dir: Path | None = None,
 ) -> BaselineTable:
     """
-    Fallback: fetch baselines via ``ref.stack()`` in a thread pool.
+    Fallback: fetch baselines via ``ref.stack()``.
 
     Only called for products that are missing local baseline data.
-    Threads are used because ``ref.stack()`` is network-bound (the GIL is
-    released during I/O, so threads genuinely run concurrently).
 
-    Lock strategy: each thread builds a local dict without any locking, then
-    acquires the shared lock once to batch-write — minimising contention.
-    ``setdefault`` ensures the first writer wins on any race.
+    A single ``stack()`` of the first product returns bperp for every stack
+    member relative to that same reference, which is enough to derive all
+    pairwise baselines among them (see :func:`_pairwise_from_anchor`).  Only
+    products absent from that stack, or without a bperp value in it, need
+    their own ``ref.stack()`` call; those run in a thread pool because
+    ``ref.stack()`` is network-bound (the GIL is released during I/O, so
+    threads genuinely run concurrently).  If the anchor stack itself cannot
+    be fetched, every product gets its own ``ref.stack()`` call instead.
+
+    Merge strategy: each thread builds and returns a local dict; only the
+    main thread, consuming ``as_completed``, writes into the shared table,
+    so no lock is needed.  ``setdefault`` keeps the first result for a pair
+    that two stacks both report.
+
+    If *cache_dir* is given, the finished table is cached there keyed by the
+    scene sets, so repeated runs on the same stack skip the network entirely.
     """
-    B: BaselineTable = {}
-    B_lock = Lock()
+    api_ids = {p.properties["sceneName"] for p in prods}
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = _baseline_cache_path(cache_dir, api_ids, ids)
+        cached = _load_cached_baselines(cache_path)
+        if cached is not None:
+            logger.info(
+                "API baseline table: %d pairs loaded from cache %s.", len(cached), cache_path,
+            )
+            return cached
+
+    # ── one anchor stack covers every member it returns a bperp for ──────
+    # If it cannot be fetched, every product falls back to its own stack below
+    try:
+        _, anchor_stack = _fetch_stack_with_retry(prods[0])
+    except Exception as exc:
+        logger.warning(
+            "Anchor stack fetch failed for %s (%s); fetching every stack separately.",
+            prods[0].properties["sceneName"], exc,
+        )
+        anchor_stack = []
+    anchor_bp: dict[SceneID, float | None] = {
+        sec.properties["sceneName"]: sec.properties.get("perpendicularBaseline")
+        for sec in anchor_stack
+    }
+    # Pairs between two locally-computed scenes are left to the local table
+    B: BaselineTable = {
+        pair: entry
+        for pair, entry in _pairwise_from_anchor(anchor_bp, ids, id_time_dt).items()
+        if pair[0] in api_ids or pair[1] in api_ids
+    }
+    covered = {sid for sid, bp in anchor_bp.items() if bp is not None}
+    prods = [p for p in prods if p.properties["sceneName"] not in covered]
 
-    def _process_ref(ref: ASFProduct) -> int:
+    def _process_ref(ref: ASFProduct) -> BaselineTable:
         rid, stacks = _fetch_stack_with_retry(ref)
         local: BaselineTable = {}
 
@@ -241,8 +391,6 @@ def _build_baseline_table_api(
             a, b = (
                 (rid, sid) if id_time_dt[rid] <= id_time_dt[sid] else (sid, rid)
             )
-            if (a, b) in B:
-                continue
             dt = sec.properties.get("temporalBaseline")
             bp = sec.properties.get("perpendicularBaseline")
             local[(a, b)] = (
@@ -250,12 +398,7 @@ def _build_baseline_table_api(
                 abs(bp) if bp is not None else _MISSING,
             )
 
-        if local:
-            with B_lock:
-                for k, v in local.items():
-                    B.setdefault(k, v)   # first writer wins; values are identical
-
-        return len(local)
+        return local
 
     with ThreadPoolExecutor(max_workers=max_workers) as pool:
         futures = {pool.submit(_process_ref, ref): ref for ref in prods}
@@ -268,10 +411,14 @@ def _build_baseline_table_api(
             for fut in bar:
                 ref = futures[fut]
                 try:
-                    n = fut.result()
+                    local = fut.result()
+                    # First result wins.  `B = local | B` would do the same, but it
+                    # copies the whole table for every stack, and `B |= local` is last-wins
+                    for k, v in local.items():
+                        B.setdefault(k, v)
                     bar.set_postfix(
                         pairs=len(B),
-                        new=n,
+                        new=len(local),
                         scene=ref.properties["sceneName"][-10:],
                     )
                 except Exception as exc:
@@ -282,8 +429,11 @@ def _build_baseline_table_api(
                     raise
 
     logger.info(
-        "API baseline table: %d pairs from %d scenes.", len(B), len(prods)
+        "API baseline table: %d pairs from %d scenes (%d extra stack requests).",
+        len(B), len(api_ids), len(prods),
     )
+    if cache_path is not None:
+        _save_cached_baselines(cache_path, B)
     return B
 
 
@@ -292,6 +442,7 @@ def _build_baseline_table(
     ids: set[SceneID],
     id_time_dt: dict[SceneID, DateFloat],
     max_workers: int,
+    cache_dir: Path | None = None,
 ) -> tuple[BaselineTable, dict]:
     """
     Route each product to the fastest available baseline source.
@@ -302,8 +453,11 @@ def _build_baseline_table(
     Returns (BaselineTable, scene_bperp) where scene_bperp maps scene name
     to signed perpendicular baseline relative to the anchor scene.
     """
-    local_prods = [p for p in prods if _has_local_baseline(p)]
-    api_prods   = [p for p in prods if not _has_local_baseline(p)]
+    # Partition in one pass so each product is inspected once
+    local_prods: list[ASFProduct] = []
+    api_prods:   list[ASFProduct] = []
+    for p in prods:
+        (local_prods if _has_local_baseline(p) else api_prods).append(p)
 
     if not api_prods:
         logger.info(
@@ -325,11 +479,73 @@ def _build_baseline_table(
         scene_bperp.update(local_bp)
 
     if api_prods:
-        B.update(_build_baseline_table_api(api_prods, ids, id_time_dt, max_workers))
+        B.update(_build_baseline_table_api(api_prods, ids, id_time_dt, max_workers, cache_dir))
 
     return B, scene_bperp
 
 
+def _select_primary(
+    B: BaselineTable,
+    targets: np.ndarray,
+    dt_tol: float,
+    dt_max: float,
+    pb_max: float,
+) -> set[Pair]:
+    """
+    Return the pairs of *B* that pass the primary baseline filter.
+
+    A pair passes if its dt is within *dt_tol* of any entry in *targets*,
+    ``dt <= dt_max`` and ``bp <= pb_max``.  The rule is evaluated for the
+    whole table in one NumPy pass instead of a Python call per pair.
+
+    *targets* must be sorted: only the nearest target on each side of a dt,
+    found with ``searchsorted``, needs testing.
+    """
+    if not B or targets.size == 0:
+        return set()
+    cands = list(B)
+    dt_bp = np.fromiter(
+        (v for entry in B.values() for v in entry),
+        dtype=np.float64, count=2 * len(B),
+    ).reshape(-1, 2)
+    dt, bp = dt_bp[:, 0], dt_bp[:, 1]
+    # Cheap scalar limits first; the target test only runs on survivors
+    sub = np.flatnonzero((dt <= dt_max) & (bp <= pb_max))
+    dt_sub = dt[sub]
+    pos = np.searchsorted(targets, dt_sub)
+    below = targets[np.maximum(pos - 1, 0)]
+    above = targets[np.minimum(pos, targets.size - 1)]
+    near = np.minimum(np.abs(dt_sub - below), np.abs(dt_sub - above)) <= dt_tol
+    return {cands[i] for i in sub[near].tolist()}
+
+
+def _baseline_matrices(
+    B: BaselineTable,
+    names: list[SceneID],
+) -> tuple[dict[SceneID, int], np.ndarray, np.ndarray]:
+    """
+    Unpack *B* into symmetric ``(N, N)`` dt and bperp matrices.
+
+    Returns ``(idx, dt_mat, bp_mat)`` where ``idx`` maps scene name to its
+    row in *names* order.  Pairs absent from *B* are NaN, so every
+    ``<=`` threshold test on them is False.
+    """
+    idx = {n: i for i, n in enumerate(names)}
+    n = len(names)
+    dt_mat = np.full((n, n), np.nan)
+    bp_mat = np.full((n, n), np.nan)
+    if B:
+        ia = np.fromiter((idx[a] for a, _ in B), dtype=np.intp, count=len(B))
+        ib = np.fromiter((idx[b] for _, b in B), dtype=np.intp, count=len(B))
+        vals = np.fromiter(
+            (v for entry in B.values() for v in entry),
+            dtype=np.float64, count=2 * len(B),
+        ).reshape(-1, 2)
+        dt_mat[ia, ib] = dt_mat[ib, ia] = vals[:, 0]
+        bp_mat[ia, ib] = bp_mat[ib, ia] = vals[:, 1]
+    return idx, dt_mat, bp_mat
+
+
 def _enforce_connectivity(
     pairs: set[Pair],
     B: BaselineTable,
@@ -359,26 +575,49 @@ def _enforce_connectivity(
     *neighbors* affects subsequent decisions, so the operations are
     order-dependent and cannot be safely parallelised.
 
-    Pre-sorting candidate lists once per scene (O(N log N) total) avoids
-    re-sorting on every degree-enforcement iteration.
+    Candidate lists are built only for scenes below *min_degree*, and
+    start as a partial (argpartition) selection of the nearest scenes, so
+    well-connected scenes cost nothing in Step A.
+
+    Baselines are looked up by integer index in dt/bperp matrices built
+    once from *B* (see :func:`_baseline_matrices`), so the inner loops do
+    not build and hash a ``(name, name)`` tuple per lookup.
     """
     neighbors: dict[SceneID, set[SceneID]] = defaultdict(set)
     for a, b in pairs:
         neighbors[a].add(b)
         neighbors[b].add(a)
 
-    # Pre-sort candidates by |Δt| for every scene — paid once, reused many times
-    sorted_cands: dict[SceneID, list[tuple[SceneID, float]]] = {
-        n: sorted(
-            ((m, abs(id_time_dt[m] - id_time_dt[n])) for m in names if m != n),
-            key=lambda x: x[1],
-        )
-        for n in names
-    }
+    idx, dt_mat, bp_mat = _baseline_matrices(B, names)
+    # Row lists make scalar reads plain Python float accesses
+    dt_rows, bp_rows = dt_mat.tolist(), bp_mat.tolist()
+    # *names* is in chronological order, so for indices i < j the pair is
+    # (names[i], names[j]) without comparing acquisition times
 
     # ── Step A: boost under-connected scenes ─────────────────────────────
     if force_connect:
-        for n in names:
+        # Candidates a scene may gain: within pb_max and dt_max (NaN = not in table)
+        with np.errstate(invalid="ignore"):
+            eligible = (dt_mat <= dt_max) & (bp_mat <= pb_max)
+        # Candidates are ordered by |Δt| (ties by index, as a stable argsort
+        # would).  A scene only needs a few of them to reach min_degree, so
+        # each list starts as just the nearest `k` scenes found with
+        # argpartition, oversampled to survive the already-a-neighbour and
+        # eligibility filters; the full sort runs only if that runs dry.
+        t = np.array([id_time_dt[n] for n in names], dtype=np.float64)
+        k = min(4 * max(min_degree, 1), len(names) - 1)
+
+        def _candidates(i: int, full: bool = False) -> list[int]:
+            d = np.abs(t - t[i])
+            if full or k >= len(names) - 1:
+                sel = np.argsort(d, kind="stable")
+            else:
+                # Every scene within the k-th nearest |Δt|, ties included
+                sel = np.flatnonzero(d <= d[np.argpartition(d, k)[k]])
+                sel = sel[np.argsort(d[sel], kind="stable")]
+            return sel[eligible[i, sel]].tolist()
+
+        for i, n in enumerate(names):
             if len(neighbors[n]) >= min_degree:
                 continue
 
@@ -387,28 +626,29 @@ def _enforce_connectivity(
                 n, len(neighbors[n]), min_degree,
             )
 
-            for m, _ in sorted_cands[n]:
-                if len(neighbors[n]) >= min_degree:
+            dt_row, bp_row = dt_rows[i], bp_rows[i]
+            # Candidates are built only here, for scenes that are short of
+            # min_degree.  Walk the nearest-k list; if it runs dry, walk the
+            # full ordering once (scenes added on the first pass are
+            # neighbours by then)
+            for full in (False, True):
+                for j in _candidates(i, full):
+                    if len(neighbors[n]) >= min_degree:
+                        break
+                    m = names[j]
+                    if m in neighbors[n]:
+                        continue
+
+                    a, b = (n, m) if i <= j else (m, n)
+                    pairs.add((a, b))
+                    neighbors[a].add(b)
+                    neighbors[b].add(a)
+                    logger.debug(
+                        "  force-added %s – %s  (dt=%.0f d, bp=%.1f m)",
+                        a, b, dt_row[j], bp_row[j],
+                    )
+                if len(neighbors[n]) >= min_degree or k >= len(names) - 1:
                     break
-                if m in neighbors[n]:
-                    continue
-
-                a, b = (n, m) if id_time_dt[n] <= id_time_dt[m] else (m, n)
-                entry = B.get((a, b))
-                if entry is None:
-                    continue
-
-                dt_val, bp_val = entry
-                if bp_val > pb_max or dt_val > dt_max:
-                    continue
-
-                pairs.add((a, b))
-                neighbors[a].add(b)
-                neighbors[b].add(a)
-                logger.debug(
-                    "  force-added %s – %s  (dt=%.0f d, bp=%.1f m)",
-                    a, b, dt_val, bp_val,
-                )
 
             if len(neighbors[n]) < min_degree:
                 logger.warning(
@@ -417,37 +657,41 @@ def _enforce_connectivity(
                 )
 
     # ── Step B: trim over-connected scenes ───────────────────────────────
-    for n in names:
+    # Pairs missing from the table rank as (0, 0), i.e. trimmed last
+    dt_rank = np.nan_to_num(dt_mat, nan=0.0).tolist()
+    bp_rank = np.nan_to_num(bp_mat, nan=0.0).tolist()
+    for i, n in enumerate(names):
+        if len(neighbors[n]) <= max_degree:
+            continue
+        dt_row, bp_row = dt_rank[i], bp_rank[i]
+        # Max-heap of neighbour indices: worst = highest dt, then highest bperp
+        # (ties keep neighbour order).  Only *n* and the dropped neighbour
+        # change degree while *n* is trimmed, so a neighbour already at
+        # min_degree can never become preferable again: it is parked in
+        # *at_min* (in rank order) and used only once the heap has no
+        # neighbour above min_degree left.
+        heap = [
+            (-dt_row[j], -bp_row[j], k, j)
+            for k, j in enumerate(idx[m] for m in neighbors[n])
+        ]
+        heapq.heapify(heap)
+        at_min: list[int] = []
+        at_min_pos = 0
         while len(neighbors[n]) > max_degree:
-            # Rank neighbours: worst = highest dt, then highest bperp
-            ranked = sorted(
-                neighbors[n],
-                key=lambda m: B.get(
-                    (n, m) if id_time_dt[n] <= id_time_dt[m] else (m, n),
-                    (0.0, 0.0),
-                ),
-                reverse=True,
-            )
-
-            removed = False
-            
-            for min_other in (min_degree + 1, min_degree):
-                for worst in ranked:
-                    if len(neighbors[worst]) < min_other:
-                        continue
-                    a, b = (
-                        (n, worst) if id_time_dt[n] <= id_time_dt[worst]
-                        else (worst, n)
-                    )
-                    pairs.discard((a, b))
-                    neighbors[n].discard(worst)
-                    neighbors[worst].discard(n)
-                    removed = True
-                    break
-                if removed:
+            j = None
+            while heap:
+                cand = heapq.heappop(heap)[-1]
+                deg = len(neighbors[names[cand]])
+                if deg > min_degree:
+                    j = cand
                     break
+                if deg == min_degree:
+                    at_min.append(cand)
+            if j is None and at_min_pos < len(at_min):
+                j = at_min[at_min_pos]
+                at_min_pos += 1
 
-            if not removed:
+            if j is None:
                 # Every neighbour is at min_degree — impossible to trim further.
                 # This happens when min_degree and max_degree conflict,
                 # e.g. min_degree=5, max_degree=3.
@@ -459,6 +703,12 @@ def _enforce_connectivity(
                 )
                 break
 
+            worst = names[j]
+            a, b = (n, worst) if i <= j else (worst, n)
+            pairs.discard((a, b))
+            neighbors[n].discard(worst)
+            neighbors[worst].discard(n)
+
     return pairs
 
 def _simplify_to_fit(geom, max_len: int = _WKT_MAX_LEN):
@@ -474,6 +724,23 @@ def _simplify_to_fit(geom, max_len: int = _WKT_MAX_LEN):
     # Last resort: convex hull is always compact
     return wkt.dumps(geom.convex_hull, rounding_precision=5)
 
+def _read_vector(path) -> gpd.GeoDataFrame:
+    """
+    Read a vector file, preferring the pyogrio engine when it is installed.
+    pyogrio reads through GDAL's columnar API and is several times faster than fiona.
+    """
+    if _VECTOR_ENGINE is None:
+        return gpd.read_file(path)
+    return gpd.read_file(path, engine=_VECTOR_ENGINE)
+
+def _bbox_to_wkt(minx, miny, maxx, maxy) -> str:
+    """
+    Format a bounding box as polygon WKT without building a GEOS geometry.
+    Matches ``wkt.dumps(box(...), rounding_precision=5)``: same CCW vertex order, 5 fixed decimals.
+    """
+    ring = ((maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny), (maxx, miny))
+    return "POLYGON ((" + ", ".join(f"{x:.5f} {y:.5f}" for x, y in ring) + "))"
+
 def _to_wkt(geom_input) -> str | None:
     """
     Converts various input types to a WKT string.
@@ -489,7 +756,7 @@ def _to_wkt(geom_input) -> str | None:
         if not all(isinstance(n, (int, float)) for n in geom_input):
             raise TypeError("All elements in BBox list must be int or float.")
         
-        return wkt.dumps(box(*geom_input), rounding_precision=5)
+        return _bbox_to_wkt(*geom_input)
     
     if isinstance(geom_input, str):
         geom_input = geom_input.strip()
@@ -502,7 +769,7 @@ def _to_wkt(geom_input) -> str | None:
         
         if is_file_path:
             try:
-                gdf = gpd.read_file(geom_input)
+                gdf = _read_vector(geom_input)
                 # Combine all geometries in the file into one
                 geom = gdf.geometry.union_all()
                 return _simplify_to_fit(geom)
@@ -535,7 +802,8 @@ def select_pairs(
     min_degree: int = 3,
     max_degree: int = 999,
     force_connect: bool = True,
-    max_workers: int = 8
+    max_workers: int = 8,
+    cache_dir: str | Path | None = None
 ) -> Union[PairGroup, list[Pair]]:
     
     """
@@ -572,6 +840,10 @@ def select_pairs(
         max_workers (int, optional):
             Number of threads for API fallback. Has no effect if all products have local baseline 
             data (common for Sentinel-1 and ALOS). Set to 1 to disable threading (useful for debugging).
+        cache_dir (str | Path | None, optional):
+            Directory in which to cache baseline tables fetched through the API fallback,
+            e.g. ``~/.cache/insarhub/baselines``. Tables with missing baselines are not cached.
+            Defaults to None (no caching).
 
     Returns:
         tuple of three elements:
@@ -608,13 +880,21 @@ def select_pairs(
             f"search_results must be a list or dict of ASFProducts, "
             f"got {type(search_results)}"
         )
+    # Validate every stack once up front rather than failing mid-way
+    bad_keys = [
+        k for k, v in working_dict.items() if not isinstance(v, (list, tuple))
+    ]
+    if bad_keys:
+        raise TypeError(
+            f"search_results values must be lists of ASFProducts; "
+            f"got {type(working_dict[bad_keys[0]])} for key {bad_keys[0]}"
+        )
 
-    # ── primary filter helpers (defined once, closed over threshold args) ─
-    def _near_target(dt: float) -> bool:
-        return any(abs(dt - t) <= dt_tol for t in dt_targets)
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir).expanduser()
 
-    def _passes_primary(dt: float, bp: float) -> bool:
-        return _near_target(dt) and dt <= dt_max and bp <= pb_max
+    # Primary filter targets, converted and sorted once for every key
+    targets = np.sort(np.asarray(dt_targets, dtype=np.float64).ravel())
 
     pairs_group: PairGroup = defaultdict(list)
     baseline_group: dict[tuple[int, int], BaselineTable] = {}
@@ -628,32 +908,32 @@ def select_pairs(
                 Fore.GREEN, key[0], key[1],
             )
 
-        # Sort by acquisition time so `names` is chronologically ordered
-        prods = sorted(search_result, key=lambda p: p.properties["startTime"])
+        # Pre-parse acquisition datetimes to Unix timestamps (done once;
+        # reused in the sort below, dt calculations, and pair ordering)
+        id_time_dt: dict[SceneID, DateFloat] = {
+            p.properties["sceneName"]: _iso_timestamp(p.properties["startTime"])
+            for p in search_result
+        }
+
+        # Sort by parsed acquisition time so `names` is chronologically
+        # ordered; _enforce_connectivity relies on this for pair ordering
+        prods = sorted(search_result, key=lambda p: id_time_dt[p.properties["sceneName"]])
 
         if not prods:
             logger.warning("No products for key %s — skipping.", key)
             continue
 
-        # Pre-parse acquisition datetimes to Unix timestamps (done once;
-        # reused in sort keys, dt calculations, and pair ordering)
-        id_time_raw: dict[SceneID, str] = {
-            p.properties["sceneName"]: p.properties["startTime"] for p in prods
-        }
-        id_time_dt: dict[SceneID, DateFloat] = {
-            sid: isoparse(t).timestamp() for sid, t in id_time_raw.items()
-        }
-        ids: set[SceneID] = set(id_time_raw)
+        ids: set[SceneID] = set(id_time_dt)
         names: list[SceneID] = [p.properties["sceneName"] for p in prods]
 
         # ── 1. Build pairwise baseline table ─────────────────────────────
-        B, scene_bp = _build_baseline_table(prods, ids, id_time_dt, max_workers=max_workers)
+        B, scene_bp = _build_baseline_table(
+            prods, ids, id_time_dt, max_workers=max_workers, cache_dir=cache_dir,
+        )
         baseline_group[key] = B
         scene_bperp_group[key] = scene_bp
         # ── 2. Primary pair selection ─────────────────────────────────────
-        pairs: set[Pair] = {
-            e for e, (dt, bp) in B.items() if _passes_primary(dt, bp)
-        }
+        pairs: set[Pair] = _select_primary(B, targets, dt_tol, dt_max, pb_max)
         logger.info(
             "Key %s — primary selection: %d / %d candidate pairs.",
             key, len(pairs), len(B),
@@ -681,24 +961,66 @@ def select_pairs(
 
     return pairs, baseline_group, scene_bperp
 
+# Parsed TOML keyed by (path, st_mtime_ns, st_size); an edited file gets a new key
+_CONFIG_CACHE: dict[tuple[str, int, int], dict] = {}
+
 def get_config(config_path=None):
 
-    """A function to load config file in TOML format"""
+    """A function to load config file in TOML format
+
+    Parsed files are cached by path, modification time and size, so loading
+    an unchanged file again costs one ``stat``. Each call returns its own
+    copy. Use ``get_config.cache_clear()`` to drop the cache.
+    """
     if config_path is None:
         config_path = Path(__file__).parent.joinpath('config.toml')        
-    config_path = Path(config_path)
-    if config_path.is_file():
+    config_path = Path(config_path).resolve()
+    try:
+        st = config_path.stat()
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(f"Config file not found under {config_path}")
+
+    key = (str(config_path), st.st_mtime_ns, st.st_size)
+    cached = _CONFIG_CACHE.get(key)
+    if cached is None:
+        # rtoml parses in native code when installed; the stdlib parser is the fallback
+        try:
+            import rtoml as _toml
+        except ImportError:
+            import tomllib as _toml
         try:
-            with open(config_path, 'rb') as f:
-                toml = tomllib.load(f)
-                cfg = Config(toml)
-                return cfg
+            # Both parsers accept text through loads(); tomllib.load() would need a binary handle
+            cached = _toml.loads(config_path.read_text(encoding='utf-8'))
         except Exception as e:
                 raise ValueError(f"Error loading config file with error {e}, is this a valid config file in TOML format?")
-    else:
-        raise FileNotFoundError(f"Config file not found under {config_path}")
+        _CONFIG_CACHE[key] = cached
+    return copy.deepcopy(cached)
+
+get_config.cache_clear = _CONFIG_CACHE.clear
     
 
+_DATE_RE_COMPACT = re.compile(r"(\d{8})")
+_DATE_RE_DASH    = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+@lru_cache(maxsize=16384)
+def _parse_scene_date(scene_name: str) -> datetime:
+    """Acquisition date embedded in a scene name (``YYYYMMDD`` or ``YYYY-MM-DD``)."""
+    if not isinstance(scene_name, str):
+        raise TypeError(
+            f"Expected str, got {type(scene_name).__name__}: {scene_name!r}."
+        )
+    m = _DATE_RE_COMPACT.search(scene_name)
+    if m:
+        return datetime.strptime(m.group(1), "%Y%m%d")
+    m = _DATE_RE_DASH.search(scene_name)
+    if m:
+        return datetime.strptime(m.group(1), "%Y-%m-%d")
+    raise ValueError(f"Cannot parse date from scene name: {scene_name}")
+
+
 def plot_pair_network(
     pairs: list[Pair] | PairGroup,
     baselines: BaselineTable,
@@ -815,20 +1137,7 @@ def plot_pair_network(
     for a, b in flat_pairs:
         scenes.update([a, b])
 
-    def _parse_date(scene_name: str) -> datetime:
-        if not isinstance(scene_name, str):
-            raise TypeError(
-                f"Expected str, got {type(scene_name).__name__}: {scene_name!r}."
-            )
-        m = re.search(r"(\d{8})", scene_name)
-        if m:
-            return datetime.strptime(m.group(1), "%Y%m%d")
-        m = re.search(r"(\d{4}-\d{2}-\d{2})", scene_name)
-        if m:
-            return datetime.strptime(m.group(1), "%Y-%m-%d")
-        raise ValueError(f"Cannot parse date from scene name: {scene_name}")
-
-    id_time: dict[SceneID, datetime] = {s: _parse_date(s) for s in scenes}
+    id_time: dict[SceneID, datetime] = {s: _parse_scene_date(s) for s in scenes}
     t0      = min(id_time.values())
     id_days: dict[SceneID, float] = {
         s: (id_time[s] - t0).total_seconds() / 86_400.0 for s in scenes
@@ -857,16 +1166,20 @@ def plot_pair_network(
         }
     else:
         # Fallback: reconstruct from pairwise table (loses sign info, may trend upward)
-        bperp_accum: dict[SceneID, list[float]] = defaultdict(list)
-        for (a, b), (dt, bp) in baselines.items():
-            if bp >= _MISSING:
-                continue
-            bperp_accum[a].append(-bp / 2.0)
-            bperp_accum[b].append(+bp / 2.0)
-        bperp_pos = {
-            s: float(np.mean(v)) if v else 0.0
-            for s, v in bperp_accum.items()
-        }
+        # Mean of -bp/2 (as earlier scene) and +bp/2 (as later scene) over each
+        # scene's pairs, accumulated with bincount instead of per-scene lists
+        bl_names = list({s for pair in baselines for s in pair})
+        bl_idx   = {s: i for i, s in enumerate(bl_names)}
+        n_bl     = len(bl_names)
+        ia = np.fromiter((bl_idx[a] for a, _ in baselines), dtype=np.intp, count=len(baselines))
+        ib = np.fromiter((bl_idx[b] for _, b in baselines), dtype=np.intp, count=len(baselines))
+        bp = np.fromiter((e[1] for e in baselines.values()), dtype=np.float64, count=len(baselines))
+        ok = ~(bp >= _MISSING)
+        ia, ib, half = ia[ok], ib[ok], bp[ok] / 2.0
+        sums   = np.bincount(ia, -half, minlength=n_bl) + np.bincount(ib, half, minlength=n_bl)
+        counts = np.bincount(ia, minlength=n_bl) + np.bincount(ib, minlength=n_bl)
+        means  = np.divide(sums, counts, out=np.zeros(n_bl), where=counts > 0)
+        bperp_pos = dict(zip(bl_names, means.tolist()))
         sorted_by_time = sorted(scenes, key=lambda s: id_days[s])
         offset = bperp_pos.get(sorted_by_time[0], 0.0)
         bperp_pos = {s: bperp_pos.get(s, 0.0) - offset for s in scenes}
@@ -880,51 +1193,61 @@ def plot_pair_network(
     max_deg      = max(degrees.values(), default=1)
     node_colours = [plt.cm.RdYlGn(degrees[n] / max_deg) for n in G.nodes()]
 
-    edge_dts     = [G[a][b]["dt"] for a, b in G.edges()]
-    max_dt       = max((d for d in edge_dts if d < _MISSING), default=1.0)
-    edge_colours = [plt.cm.RdYlGn_r(min(dt, max_dt) / max_dt) for dt in edge_dts]
-    edge_widths  = [0.5 + 2.5 * (1.0 - min(dt, max_dt) / max_dt) for dt in edge_dts]
+    # Snapshot edges and their attributes once instead of G[a][b] per edge
+    edge_data    = list(G.edges(data=True))
+    edges        = [(a, b) for a, b, _ in edge_data]
+    edge_dts     = np.array([d["dt"] for _, _, d in edge_data], dtype=np.float64)
+    valid_dts    = edge_dts[edge_dts < _MISSING]
+    max_dt       = float(valid_dts.max()) if valid_dts.size else 1.0
+    dt_frac      = np.minimum(edge_dts, max_dt) / max_dt
+    edge_colours = plt.cm.RdYlGn_r(dt_frac)          # (E, 4) RGBA rows
+    edge_widths  = 0.5 + 2.5 * (1.0 - dt_frac)
 
     if isinstance(pairs, dict):
         group_keys  = list(pairs.keys())
         linestyles  = ["-", "--", "-.", ":"] * (len(group_keys) // 4 + 1)
         key_style   = {k: linestyles[i] for i, k in enumerate(group_keys)}
-        edge_styles = [
-            key_style[(G[a][b]["path"], G[a][b]["frame"])] for a, b in G.edges()
-        ]
+        edge_styles = [key_style[(d["path"], d["frame"])] for _, _, d in edge_data]
     else:
-        edge_styles = ["-"] * len(G.edges())
+        edge_styles = ["-"] * len(edges)
 
     # ── 5. Figure layout ──────────────────────────────────────────────────
-    fig = plt.figure(figsize=figsize)
+    # Constrained layout fits labels/legends while drawing, so savefig needs
+    # no bbox_inches="tight" pre-render pass
+    fig = plt.figure(figsize=figsize, layout="constrained")
     gs  = fig.add_gridspec(1, 2, width_ratios=[3, 1], wspace=0.35)
     ax_net  = fig.add_subplot(gs[0])
     ax_hist = fig.add_subplot(gs[1])
 
     # ── 6. Draw network ───────────────────────────────────────────────────
-    edges_by_style: dict[str, list] = defaultdict(list)
-    for (a, b), style, colour, width in zip(
-        G.edges(), edge_styles, edge_colours, edge_widths
-    ):
-        edges_by_style[style].append((a, b, colour, width))
-
-    for style, edge_data in edges_by_style.items():
-        nx.draw_networkx_edges(
-            G, pos, ax=ax_net,
-            edgelist=[(a, b) for a, b, _, _ in edge_data],
-            edge_color=[c for _, _, c, _ in edge_data],
-            width=[w for _, _, _, w in edge_data],
-            style=style,
+    # All edges go into one LineCollection with per-edge colour, width and
+    # line style, instead of one networkx draw call per style.  It is
+    # rasterized in vector outputs (PDF/SVG) so file size and save time do
+    # not scale with the pair count; axes, labels and legends stay vector.
+    if edges:
+        segments = np.array(
+            [(pos[a], pos[b]) for a, b in edges], dtype=np.float64
+        ).reshape(-1, 2, 2)
+        edge_lc = LineCollection(
+            segments,
+            colors=edge_colours,
+            linewidths=edge_widths,
+            linestyles=edge_styles,
             alpha=0.7,
+            zorder=1,
+            rasterized=True,
         )
+        ax_net.add_collection(edge_lc)
+        ax_net.autoscale_view()
 
-    nx.draw_networkx_nodes(
+    node_art = nx.draw_networkx_nodes(
         G, pos, ax=ax_net,
         node_color=node_colours,
         node_size=80,
         linewidths=0.5,
         edgecolors="black",
     )
+    node_art.set_rasterized(True)
     nx.draw_networkx_labels(
         G, pos,
         labels={s: s[-8:] for s in G.nodes()},
@@ -977,14 +1300,8 @@ def plot_pair_network(
         height=0.7,
     )
 
-    # annotate each bar with connection count
-    for bar, count in zip(bars, scene_degrees):
-        ax_hist.text(
-            bar.get_width() + 0.1,
-            bar.get_y() + bar.get_height() / 2,
-            str(count),
-            va="center", fontsize=7,
-        )
+    # annotate each bar with connection count in one pass
+    ax_hist.bar_label(bars, labels=[str(c) for c in scene_degrees], padding=2, fontsize=7)
 
     # vertical line at mean degree
     mean_deg = np.mean(scene_degrees)
@@ -998,10 +1315,10 @@ def plot_pair_network(
     )
 
     # mark scenes below min connectivity in red
-    for i, (s, deg) in enumerate(zip(sorted_scene_names, scene_degrees)):
+    for bar, deg in zip(bars, scene_degrees):
         if deg < 2:
-            ax_hist.get_children()[i].set_edgecolor("red")
-            ax_hist.get_children()[i].set_linewidth(1.5)
+            bar.set_edgecolor("red")
+            bar.set_linewidth(1.5)
 
     ax_hist.set_yticks(y_positions)
     ax_hist.set_yticklabels(short_names, fontsize=6)
@@ -1047,11 +1364,12 @@ def plot_pair_network(
         )
 
     if save_path:
-        fig.savefig(save_path.as_posix(), dpi=300, bbox_inches="tight")
+        fig.savefig(save_path.as_posix(), dpi=_NETWORK_DPI)
         print(f"Saved → {save_path}")
 
     return fig
 
+
 def earth_credit_pool(earthdata_credentials_pool_path = Path.home().joinpath('.credit_pool')) -> dict:
     """
     Load Earthdata credentials from a local credit pool file.
@@ -1112,7 +1430,7 @@ def clip_hyp3_insar(workdir: Path | str, aoi: list[float] | str | Path, file_suf
             '_lv_theta.tif', '_lv_phi.tif', '_water_mask.tif'
         ]
     print(f"Loading AOI: {aoi}")
-    raw_aoi = gpd.read_file(aoi) if isinstance(aoi, (str, Path)) else gpd.GeoDataFrame({'geometry': [box(*aoi, ccw=True)]}, crs="EPSG:4326")
+    raw_aoi = _read_vector(aoi) if isinstance(aoi, (str, Path)) else gpd.GeoDataFrame({'geometry': [box(*aoi, ccw=True)]}, crs="EPSG:4326")
 
     if isinstance(workdir, str):
         workdir = Path(workdir).expanduser().resolve()
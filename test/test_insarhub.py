@@ -201,6 +201,29 @@ class TestUtils:
         from insarhub.utils.tool import clip_hyp3_insar
         assert callable(clip_hyp3_insar)
 
+    def test_baseline_cache_skips_api(self, tmp_path, monkeypatch):
+        """A second API-fallback table build for the same scenes is served from cache_dir."""
+        from types import SimpleNamespace
+        from insarhub.utils import tool
+        scenes = {"S1_A": (0.0, 0.0), "S1_B": (12 * 86400.0, 35.0), "S1_C": (24 * 86400.0, -20.0)}
+        prods = [SimpleNamespace(properties={"sceneName": n, "perpendicularBaseline": bp})
+                 for n, (_, bp) in scenes.items()]
+        id_time_dt = {n: t for n, (t, _) in scenes.items()}
+        calls = []
+
+        def fake_fetch(ref, max_attempts=10):
+            calls.append(ref.properties["sceneName"])
+            return ref.properties["sceneName"], prods
+
+        monkeypatch.setattr(tool, "_fetch_stack_with_retry", fake_fetch)
+        first = tool._build_baseline_table_api(prods, set(scenes), id_time_dt, 1, cache_dir=tmp_path)
+        assert calls and list(tmp_path.glob("*.json"))
+        n_calls = len(calls)
+        second = tool._build_baseline_table_api(prods, set(scenes), id_time_dt, 1, cache_dir=tmp_path)
+        assert len(calls) == n_calls
+        assert second == first
+        assert second[("S1_A", "S1_B")] == (12.0, 35.0)
+
 
 # ===========================================================================
 # 7. COMMANDS LAYER
@@ -382,3 +405,82 @@ class TestStacksDedup:
         frames = list(dict.fromkeys(f for _, f in parsed))
         assert orbits == [28, 93]
         assert frames == [107, 116]
+
+
+# ===========================================================================
+# 11. ERA5 BINARY PARSERS (GeoTIFF header, GRIB splitting)
+# ===========================================================================
+
+def _grib1_message(year, month, day, hour):
+    """Minimal GRIB1 message: indicator, 28-byte PDS, end section."""
+    pds = bytearray(28)
+    pds[0:3] = (28).to_bytes(3, "big")
+    century, yy = divmod(year - 1, 100)
+    pds[12], pds[13], pds[14], pds[15] = yy + 1, month, day, hour
+    pds[24] = century + 1
+    length = 8 + len(pds) + 4
+    return b"GRIB" + length.to_bytes(3, "big") + b"\x01" + bytes(pds) + b"7777"
+
+
+def _grib2_message(year, month, day, hour):
+    """Minimal GRIB2 message: indicator, identification section, end section."""
+    ids = bytearray(21)
+    ids[0:4] = (21).to_bytes(4, "big")
+    ids[4] = 1
+    ids[12:14] = year.to_bytes(2, "big")
+    ids[14], ids[15], ids[16] = month, day, hour
+    length = 16 + len(ids) + 4
+    return b"GRIB\x00\x00\x00\x02" + length.to_bytes(8, "big") + bytes(ids) + b"7777"
+
+
+class TestERA5Parsers:
+    @pytest.mark.parametrize("profile, point", [
+        ({}, False),
+        ({"BIGTIFF": "YES"}, False),
+        ({}, True),
+    ], ids=["tiff", "bigtiff", "pixel_is_point"])
+    def test_geotiff_bounds_matches_rasterio(self, tmp_path, profile, point):
+        import numpy as np
+        import rasterio
+        from rasterio.transform import from_origin
+        from insarhub.utils.batch import ERA5Downloader
+        path = tmp_path / "dem.tif"
+        with rasterio.open(
+            path, "w", driver="GTiff", width=64, height=32, count=1, dtype="float32",
+            crs="EPSG:32633", transform=from_origin(500000, 4000000, 30, 20), **profile,
+        ) as dst:
+            dst.write(np.zeros((1, 32, 64), dtype=np.float32))
+            if point:
+                dst.update_tags(AREA_OR_POINT="Point")
+        with rasterio.open(path) as src:
+            expected, epsg = tuple(src.bounds), src.crs.to_epsg()
+        header = path.read_bytes()[:ERA5Downloader.TIFF_HEADER_BYTES]
+        bounds, parsed_epsg = ERA5Downloader._geotiff_bounds(header)
+        assert parsed_epsg == epsg == 32633
+        assert bounds == pytest.approx(expected)
+
+    def test_geotiff_bounds_rejects_non_tiff(self):
+        from insarhub.utils.batch import ERA5Downloader
+        assert ERA5Downloader._geotiff_bounds(b"not a tiff header") is None
+
+    @pytest.mark.parametrize("make_message", [_grib1_message, _grib2_message], ids=["grib1", "grib2"])
+    def test_split_grib_by_time(self, tmp_path, make_message):
+        from insarhub.utils.batch import ERA5Downloader
+        messages = {
+            ("19991231", "18"): [make_message(1999, 12, 31, 18)],
+            ("20210305", "06"): [make_message(2021, 3, 5, 6), make_message(2021, 3, 5, 6)],
+        }
+        grib = tmp_path / "batch.grb"
+        grib.write_bytes(b"".join(m for chunks in messages.values() for m in chunks)
+                         + make_message(2021, 3, 5, 12))
+        dest_paths = {key: tmp_path / f"ERA5_{key[0]}_{key[1]}.grb" for key in messages}
+        ERA5Downloader._split_grib_by_time(grib, dest_paths)
+        for key, chunks in messages.items():
+            assert dest_paths[key].read_bytes() == b"".join(chunks)
+
+    def test_split_grib_by_time_missing_step(self, tmp_path):
+        from insarhub.utils.batch import ERA5Downloader
+        grib = tmp_path / "batch.grb"
+        grib.write_bytes(_grib1_message(2021, 3, 5, 6))
+        with pytest.raises(ValueError):
+            ERA5Downloader._split_grib_by_time(grib, {("20210306", "06"): tmp_path / "out.grb"})